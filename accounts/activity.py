@@ -0,0 +1,71 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Case, When, F, Value, DateTimeField
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+
+class ActivityBuffer:
+    """
+    Collects per-user timestamps in memory and writes them with one bulk UPDATE
+    at most every LAST_ACTIVITY_INTERVAL seconds
+    """
+    batch_size = 500
+
+    def __init__(self, field):
+        self.field = field
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, user_id, when=None):
+        with self.lock:
+            self.pending[user_id] = when or timezone.now()
+
+    def should_flush(self):
+        return bool(self.pending) and time.monotonic() - self.last_flush >= settings.LAST_ACTIVITY_INTERVAL
+
+    def flush(self):
+        """
+        Write buffered timestamps, returns the number of updated users.
+        On a database error the unwritten timestamps are put back and the error is raised
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.last_flush = time.monotonic()
+
+        items = list(pending.items())
+        updated = 0
+        for i in range(0, len(items), self.batch_size):
+            try:
+                updated += self.write(items[i:i + self.batch_size])
+            except Exception:
+                self.requeue(items[i:])
+                raise
+        return updated
+
+    def write(self, batch):
+        from .models import User
+
+        # never move a timestamp back, e.g. one written meanwhile by another process.
+        # Greatest is NULL with a NULL argument except on PostgreSQL, hence the Coalesce for last_login
+        value = Case(
+            *[When(id=user_id, then=Greatest(Coalesce(F(self.field), Value(when)), Value(when)))
+              for user_id, when in batch],
+            output_field=DateTimeField()
+        )
+        return User.objects.filter(id__in=[user_id for user_id, _ in batch]).update(**{self.field: value})
+
+    def requeue(self, items):
+        """
+        Put back timestamps that were not written, for the next flush
+        """
+        with self.lock:
+            for user_id, when in items:
+                self.pending[user_id] = max(when, self.pending.get(user_id, when))
+
+
+last_activity = ActivityBuffer('last_activity')
+last_login = ActivityBuffer('last_login')
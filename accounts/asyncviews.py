@@ -0,0 +1,20 @@
+"""
+Async login and sign-up, mounted with TASK_ASYNC_VIEWS. Their password hashing runs in the bounded pool of
+config.hashers instead of the one thread that runs the sync ORM work of every async view of the process
+"""
+from config.asyncviews import AsyncAPIViewMixin
+from config.hashers import run_in_hashing_pool
+from . import views
+from .views import UserListView  # noqa: F401, no hashing
+
+
+class LoginView(AsyncAPIViewMixin, views.LoginView):
+
+    async def post(self, request, *args, **kwargs):
+        return await run_in_hashing_pool(super().post, request, *args, **kwargs)
+
+
+class SignUpView(AsyncAPIViewMixin, views.SignUpView):
+
+    async def post(self, request):
+        return await run_in_hashing_pool(super().post, request)
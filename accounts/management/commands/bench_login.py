@@ -0,0 +1,89 @@
+import threading
+import time
+
+from rest_framework.test import APIClient
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User
+from config.metrics import percentile
+from tasks.seed import SEED_PASSWORD, seed_tasks, throwaway_database
+
+
+class Command(BaseCommand):
+    help = ('Measure the hashing cost and login throughput of every password hasher '
+            'on a seeded throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashers', nargs='+', choices=tuple(settings.PASSWORD_HASHER_CLASSES),
+                            default=list(settings.PASSWORD_HASHER_CLASSES))
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=200, help='Logins per hasher')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent clients')
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            for name in options['hashers']:
+                preferred = settings.PASSWORD_HASHER_CLASSES[name]
+                hashers = [preferred] + [path for path in settings.PASSWORD_HASHERS if path != preferred]
+                with override_settings(PASSWORD_HASHERS=hashers):
+                    self.measure(name, options)
+
+    def measure(self, name, options):
+        User.objects.all().delete()
+        seed_tasks(users=options['users'], tasks=0)
+        emails = list(User.objects.values_list('email', flat=True))
+
+        started = time.perf_counter()
+        for _ in range(10):
+            make_password(SEED_PASSWORD)
+        hash_ms = (time.perf_counter() - started) * 100
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.login(APIClient(SERVER_NAME='localhost'), emails[0])
+        writes = sum(query['sql'].startswith(('UPDATE', 'INSERT')) for query in ctx.captured_queries)
+
+        latencies, errors = [], []
+        remaining = iter(range(options['requests']))
+        lock = threading.Lock()
+
+        def client():
+            api_client = APIClient(SERVER_NAME='localhost')
+            try:
+                while True:
+                    with lock:
+                        i = next(remaining, None)
+                    if i is None:
+                        return
+                    request_started = time.perf_counter()
+                    status = self.login(api_client, emails[i % len(emails)])
+                    with lock:
+                        latencies.append((time.perf_counter() - request_started) * 1000)
+                        if status != 200:
+                            errors.append(status)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=client) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(
+            f'{name}: hash {hash_ms:.1f}ms, {len(latencies) / elapsed:.1f} logins/s with {options["threads"]} '
+            f'clients, p50 {percentile(latencies, 0.5):.1f}ms, p95 {percentile(latencies, 0.95):.1f}ms, '
+            f'{len(ctx.captured_queries)} queries ({writes} writes) per login, {len(errors)} errors'
+        )
+
+    def login(self, client, email):
+        return client.post(reverse('token_obtain_pair'), {'email': email, 'password': SEED_PASSWORD}).status_code
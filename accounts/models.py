@@ -50,6 +50,9 @@ class User(AbstractUser):
 
     class Meta:
         swappable = 'AUTH_USER_MODEL'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='user_created_at_id_idx'),
+        ]
 
     def __str__(self):
         return self.get_full_name() or self.email
@@ -2,6 +2,8 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
 from rest_framework import serializers
 
+from config.metrics import TimedSerializerMixin
+from .activity import last_login
 from .models import User
 
 
@@ -15,6 +17,12 @@ class LoginSerializer(TokenObtainPairSerializer):
         token['email'] = user.email
         return token
 
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # coalesced into a bulk write instead of UPDATE_LAST_LOGIN's save() on every login
+        last_login.record(self.user.id)
+        return data
+
 
 class SignUpSerializer(serializers.ModelSerializer):
     password = serializers.CharField(label='password', min_length=8, max_length=128, write_only=True)
@@ -27,12 +35,17 @@ class SignUpSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     full_name = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = ['id', 'full_name']
+        list_serializer_class = UserListSerializer
 
     def get_full_name(self, obj):
         return obj.get_full_name()
@@ -1,3 +1,304 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from rest_framework.test import APITestCase, APITransactionTestCase
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from config import hashers
+from config.authentication import JWTAuthentication, token_cache, user_cache
+from config.metrics import endpoint_stats
+from config.middleware import LastActivityMiddleware
+from . import asyncviews
+from .activity import ActivityBuffer, last_activity, last_login
+from .models import User
+from .urls import account_urlpatterns
+
+
+class ActivityBufferTests(TestCase):
+
+    def test_flush_updates_all_users_in_one_query(self):
+        users = [User.objects.create_user(f'user{i}@test.com', 'password') for i in range(3)]
+        buffer = ActivityBuffer('last_activity')
+        now = timezone.now()
+        for i, user in enumerate(users):
+            buffer.record(user.id, now + timedelta(minutes=i))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(buffer.flush(), 3)
+
+        for i, user in enumerate(users):
+            user.refresh_from_db()
+            self.assertEqual(user.last_activity, now + timedelta(minutes=i))
+        self.assertEqual(buffer.flush(), 0)
+
+
+    def test_flush_keeps_newer_timestamps(self):
+        user = User.objects.create_user('user@test.com', 'password')
+        now = timezone.now()
+        User.objects.filter(id=user.id).update(last_activity=now)
+        buffer, logins = ActivityBuffer('last_activity'), ActivityBuffer('last_login')
+        buffer.record(user.id, now - timedelta(minutes=5))
+        logins.record(user.id, now)
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(logins.flush(), 1)
+        user.refresh_from_db()
+        self.assertEqual(user.last_activity, now)
+        self.assertEqual(user.last_login, now)
+
+    def test_failed_flush_puts_timestamps_back(self):
+        user = User.objects.create_user('user@test.com', 'password')
+        buffer = ActivityBuffer('last_activity')
+        now = timezone.now()
+        buffer.record(user.id, now - timedelta(minutes=5))
+
+        with mock.patch.object(buffer, 'write', side_effect=DatabaseError('connection lost')):
+            with self.assertRaises(DatabaseError):
+                buffer.flush()
+        self.assertEqual(buffer.pending, {user.id: now - timedelta(minutes=5)})
+
+        buffer.requeue([(user.id, now - timedelta(minutes=10))])
+        self.assertEqual(buffer.pending, {user.id: now - timedelta(minutes=5)})
+        self.assertEqual(buffer.flush(), 1)
+
+class LastActivityMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@test.com', 'password')
+        token = User.get_tokens_for_user(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        last_activity.flush()
+
+    def test_token_request_does_not_write(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('user_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(query['sql'].startswith(('UPDATE', 'INSERT')) for query in ctx.captured_queries))
+        self.assertIn(self.user.id, last_activity.pending)
+        self.assertNotIn('sessionid', response.cookies)
+
+    @override_settings(LAST_ACTIVITY_INTERVAL=0)
+    def test_buffer_is_flushed_after_interval(self):
+        before = self.user.last_activity
+        self.client.get(reverse('user_list'))
+
+        self.user.refresh_from_db()
+        self.assertGreater(self.user.last_activity, before)
+        self.assertEqual(last_activity.pending, {})
+
+    @override_settings(LAST_ACTIVITY_INTERVAL=0)
+    def test_failed_flush_is_logged(self):
+        with mock.patch.object(last_activity, 'write', side_effect=DatabaseError('connection lost')):
+            with self.assertLogs('config.middleware', 'ERROR'):
+                response = self.client.get(reverse('user_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(self.user.id, last_activity.pending)
+
+    def test_malformed_header_is_unauthorized(self):
+        for header in ('Bearer', 'Bearer a b'):
+            with self.subTest(header=header):
+                self.client.credentials(HTTP_AUTHORIZATION=header)
+                response = self.client.get(reverse('user_list'))
+
+                self.assertEqual(response.status_code, 401)
+                self.assertNotIn(self.user.id, last_activity.pending)
+
+    def test_malformed_header_is_ignored_by_async_middleware(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = LastActivityMiddleware(get_response)
+        for header in ('Bearer', 'Bearer a b'):
+            with self.subTest(header=header):
+                request = RequestFactory().get('/', HTTP_AUTHORIZATION=header)
+                response = async_to_sync(middleware)(request)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn(self.user.id, last_activity.pending)
+
+
+class JWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@test.com', 'password')
+        token = User.get_tokens_for_user(self.user)['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        user_cache.clear()
+        token_cache.clear()
+
+    def test_token_is_validated_once_per_request(self):
+        with mock.patch.object(JWTAuthentication, 'get_validated_token',
+                               autospec=True, side_effect=JWTAuthentication.get_validated_token) as validate:
+            response = self.client.get(reverse('user_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(validate.call_count, 1)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        response = self.client.get(reverse('user_list'))
+
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(JWT_USER_CACHE_TTL=60)
+    def test_user_cache(self):
+        self.client.get(reverse('user_list'))
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('user_list'))
+
+        self.assertEqual(response.status_code, 200)
+        # only pagination count and the list itself
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+    def test_verified_tokens_are_cached_until_exp(self):
+        with mock.patch('rest_framework_simplejwt.authentication.JWTAuthentication.get_validated_token',
+                        autospec=True, side_effect=authentication.JWTAuthentication.get_validated_token) as verify:
+            for _ in range(2):
+                self.assertEqual(self.client.get(reverse('user_list')).status_code, 200)
+        self.assertEqual(verify.call_count, 1)
+
+        token = AccessToken.for_user(self.user)
+        token.set_exp(lifetime=timedelta(seconds=2))
+        token_cache.clear()
+        JWTAuthentication().get_validated_token(str(token).encode())
+        [(_, expires_at)] = token_cache.data.values()
+        self.assertLessEqual(expires_at - time.monotonic(), 2)
+
+    @override_settings(JWT_STATELESS_READS=True)
+    def test_stateless_reads(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('user_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        response = self.client.post(reverse('task_list_view'), {'title': 'Task', 'content': 'Content'})
+        self.assertEqual(response.status_code, 201)
+
+        User.objects.filter(id=self.user.id).update(is_staff=True)
+        self.assertEqual(self.client.get(reverse('performance_stats')).status_code, 200)
+
+
+class PerformanceMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        endpoint_stats.clear()
+        self.user = User.objects.create_user('user@test.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_and_stats(self):
+        with self.assertLogs('config.performance', 'INFO') as logs:
+            response = self.client.get(reverse('user_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn('serialize;dur=', timing)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['endpoint'], 'GET /accounts/')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+
+        stats = endpoint_stats.snapshot()['GET /accounts/']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_stats_are_staff_only(self):
+        self.client.get(reverse('user_list'))
+        self.assertEqual(self.client.get(reverse('performance_stats')).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('performance_stats'))
+        self.assertIn('GET /accounts/', response.data)
+
+
+class LoginTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@test.com', 'password')
+        last_login.flush()
+
+    def login(self):
+        return self.client.post(reverse('token_obtain_pair'), {'email': 'user@test.com', 'password': 'password'})
+
+    def test_login_is_read_only(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any(query['sql'].startswith(('UPDATE', 'INSERT')) for query in ctx.captured_queries))
+        self.assertIn(self.user.id, last_login.pending)
+
+        self.assertEqual(last_login.flush(), 1)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_password_is_rehashed_on_login(self):
+        User.objects.filter(id=self.user.id).update(password=make_password('password', hasher='pbkdf2_sha256'))
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('argon2$'))
+
+        with override_settings(PASSWORD_ARGON2_TIME_COST=3):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertIn('t=3', self.user.password)
+
+
+class AsyncURLConf:
+    urlpatterns = [
+        path('accounts/', include(account_urlpatterns(asyncviews))),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncLoginTests(APITransactionTestCase):
+    """
+    The async views hash in the pool, whose threads use their own DB connections
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('user@test.com', 'password')
+        last_login.flush()
+
+    def login(self):
+        return self.client.post(reverse('token_obtain_pair'), {'email': 'user@test.com', 'password': 'password'})
+
+    def test_login_and_sign_up(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+        self.assertIn(self.user.id, last_login.pending)
+
+        response = self.client.post('/accounts/signup/', {'email': 'new@test.com', 'password': 'password'})
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(User.objects.get(email='new@test.com').check_password('password'))
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_TIMEOUT=0)
+    def test_busy_hashing_responds_429(self):
+        with mock.patch.object(hashers, '_executor', None):
+            executor = hashers.get_executor()
+            release = threading.Event()
+            executor.submit(release.wait)
+            try:
+                self.assertEqual(self.login().status_code, 429)
+            finally:
+                release.set()
+
+            with override_settings(PASSWORD_HASHING_TIMEOUT=10):
+                self.assertEqual(self.login().status_code, 200)
+            executor.shutdown()
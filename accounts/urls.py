@@ -1,12 +1,18 @@
 from rest_framework_simplejwt.views import TokenRefreshView
 
+from django.conf import settings
 from django.urls import path
 
-from accounts.views import SignUpView, LoginView, UserListView
+from accounts import asyncviews, views
 
-urlpatterns = [
-    path('', UserListView.as_view(), name='user_list'),
-    path('signup/', SignUpView.as_view()),
-    path('login/', LoginView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-]
+
+def account_urlpatterns(views):
+    return [
+        path('', views.UserListView.as_view(), name='user_list'),
+        path('signup/', views.SignUpView.as_view()),
+        path('login/', views.LoginView.as_view(), name='token_obtain_pair'),
+        path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    ]
+
+
+urlpatterns = account_urlpatterns(asyncviews if settings.TASK_ASYNC_VIEWS else views)
@@ -1,4 +1,4 @@
-from rest_framework import status, generics
+from rest_framework import exceptions, status, generics
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -6,11 +6,26 @@ from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 from drf_yasg.utils import swagger_auto_schema
 
+from config.hashers import HashingBusy
+from config.pagination import TimelinePagination
+from config.renderers import FastReadMixin
+from .fastserializers import USER_VALUES, serialize_users
 from .serializers import LoginSerializer, SignUpSerializer, UserSerializer
 from .models import User
 
 
-class LoginView(TokenObtainPairView):
+class HashingLimitMixin:
+    """
+    Responds with 429 when the hashing pool of the async views is busy for PASSWORD_HASHING_TIMEOUT
+    """
+
+    def handle_exception(self, exc):
+        if isinstance(exc, HashingBusy):
+            exc = exceptions.Throttled(detail='Too many password checks in progress, try again later')
+        return super().handle_exception(exc)
+
+
+class LoginView(HashingLimitMixin, TokenObtainPairView):
     permission_classes = (AllowAny,)
     serializer_class = LoginSerializer
 
@@ -23,7 +38,7 @@ class LoginView(TokenObtainPairView):
         return super().post(request, *args, **kwargs)
 
 
-class SignUpView(APIView):
+class SignUpView(HashingLimitMixin, APIView):
     permission_classes = (AllowAny,)
     serializer_class = SignUpSerializer
 
@@ -42,10 +57,11 @@ class SignUpView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserListView(generics.ListAPIView):
-    queryset = User.objects.filter(is_superuser=False)
+class UserListView(FastReadMixin, generics.ListAPIView):
+    queryset = User.objects.filter(is_superuser=False).order_by('created_at', 'id')
     serializer_class = UserSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = TimelinePagination
 
     @swagger_auto_schema(
         operation_id="user_list",
@@ -55,3 +71,14 @@ class UserListView(generics.ListAPIView):
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
+    def list(self, request, *args, **kwargs):
+        if not self.fast_read:
+            return super().list(request, *args, **kwargs)
+
+        # created_at is read by cursor pagination
+        queryset = self.filter_queryset(self.get_queryset()).values(*USER_VALUES, 'created_at')
+        rows = self.paginate_queryset(queryset)
+        if rows is None:
+            return Response(serialize_users(queryset))
+        return self.get_paginated_response(serialize_users(rows))
+
@@ -7,6 +7,7 @@ For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
 """
 
+import json
 import os
 
 from django.core.asgi import get_asgi_application
@@ -14,4 +15,52 @@ from django.core.asgi import get_asgi_application
 config_name = os.environ.get('CONFIG_NAME')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', f'config.settings.{config_name}')
 
-application = get_asgi_application()
+
+class BodySizeLimit:
+    """
+    Responds with 413 to request bodies over `max_size`. Django's ASGI handler spools the whole body
+    before any view runs, so the early size checks of the upload handlers no longer bound the disk use
+    """
+    response = json.dumps({'detail': 'Request body is too large', 'status_code': 413}).encode()
+
+    def __init__(self, app, max_size):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        content_length = dict(scope['headers']).get(b'content-length', b'')
+        if content_length.isdigit() and int(content_length) > self.max_size:
+            return await self.reject(send)
+
+        # chunked bodies are counted while they are read, Django stops reading on a disconnect
+        received = 0
+        too_large = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_size:
+                    too_large = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        await self.app(scope, limited_receive, send)
+        if too_large:
+            await self.reject(send)
+
+    async def reject(self, send):
+        await send({'type': 'http.response.start', 'status': 413,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': self.response})
+
+
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402, configured by get_asgi_application()
+
+application = BodySizeLimit(django_application, settings.REQUEST_BODY_MAX_SIZE)
@@ -0,0 +1,57 @@
+from itertools import islice
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+
+class AsyncAPIViewMixin:
+    """
+    Runs an APIView as a Django async view: handlers may be coroutines that use the async ORM.
+    Authentication, permissions and throttling run in a worker thread, sync handlers too.
+    Exceptions and responses are handled as in APIView.dispatch
+    """
+    view_is_async = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # async handlers keep the swagger_auto_schema of the sync handlers they replace
+        for name in cls.http_method_names:
+            handler = cls.__dict__.get(name)
+            if handler is None or hasattr(handler, '_swagger_auto_schema'):
+                continue
+            if schema := getattr(getattr(super(cls, cls), name, None), '_swagger_auto_schema', None):
+                handler._swagger_auto_schema = schema
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            if iscoroutinefunction(handler):
+                response = await handler(request, *args, **kwargs)
+            else:
+                response = await sync_to_async(handler)(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+async def aiterate(iterator, batch_size=100):
+    """
+    Async iterator over a sync one, e.g. a queryset iterator, fetching `batch_size` items per worker thread hop
+    """
+    next_batch = sync_to_async(lambda: list(islice(iterator, batch_size)))
+    while batch := await next_batch():
+        for item in batch:
+            yield item
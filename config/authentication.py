@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt import authentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import Token
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+
+class TTLCache:
+    """
+    Small thread-safe in-process LRU cache with per-entry expiry
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            item = self.data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self.data[key]
+                return None
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.data[key] = (value, time.monotonic() + ttl)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+user_cache = TTLCache(maxsize=1024)
+token_cache = TTLCache(maxsize=settings.JWT_TOKEN_CACHE_SIZE)
+
+
+def get_http_request(request):
+    # DRF wraps the Django request, middleware gets it as is
+    return getattr(request, '_request', request)
+
+
+class TokenUser:
+    """
+    User of a read-only request built from the claims of a verified token, see JWT_STATELESS_READS.
+    id and email come from the token, any other attribute loads the user once
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, validated_token):
+        self.token = validated_token
+        self.id = self.pk = get_user_model()._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        self.email = validated_token.get('email')
+
+    def __getattr__(self, name):
+        # only called for attributes that are not set above
+        if '_user' not in self.__dict__:
+            self.__dict__['_user'] = JWTAuthentication().get_user(self.token)
+        return getattr(self.__dict__['_user'], name)
+
+    def __str__(self):
+        return self.email or str(self.id)
+
+
+class JWTAuthentication(authentication.JWTAuthentication):
+    """
+    Validates the bearer token once per request and stores the result on the
+    Django request, so LastActivityMiddleware and DRF share the same work.
+    Verified tokens are cached by digest until they expire, at most JWT_TOKEN_CACHE_TTL seconds.
+    Users can be cached for JWT_USER_CACHE_TTL seconds by user id and token jti.
+    """
+
+    def authenticate(self, request):
+        http_request = get_http_request(request)
+        if auth := getattr(http_request, 'jwt_auth', None):
+            return auth
+
+        validated_token = self.get_request_token(request)
+        if validated_token is None:
+            return None
+
+        http_request.jwt_auth = (self.get_request_user(request, validated_token), validated_token)
+        return http_request.jwt_auth
+
+    def get_request_user(self, request, validated_token):
+        stateless = settings.JWT_STATELESS_READS and request.method in SAFE_METHODS
+        if stateless and api_settings.USER_ID_CLAIM in validated_token:
+            return TokenUser(validated_token)
+        return self.get_user(validated_token)
+
+    def get_request_token(self, request):
+        """
+        Validated token of the request or None when there is no bearer token.
+        Raises InvalidToken for bad tokens, failures are not cached
+        """
+        http_request = get_http_request(request)
+        if hasattr(http_request, 'jwt_token'):
+            return http_request.jwt_token
+
+        header = self.get_header(request)
+        raw_token = self.get_raw_token(header) if header is not None else None
+        http_request.jwt_token = self.get_validated_token(raw_token) if raw_token is not None else None
+        return http_request.jwt_token
+
+    def get_validated_token(self, raw_token):
+        """
+        Skips signature and claim checks of tokens verified before, failures are not cached
+        """
+        max_ttl = settings.JWT_TOKEN_CACHE_TTL
+        if not max_ttl:
+            return super().get_validated_token(raw_token)
+
+        key = hashlib.sha256(raw_token.encode() if isinstance(raw_token, str) else raw_token).digest()
+        validated_token = token_cache.get(key)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            expires_in = validated_token.get('exp', 0) - time.time()
+            if (ttl := min(max_ttl, expires_in)) > 0:
+                token_cache.set(key, validated_token, ttl)
+        return validated_token
+
+    def get_user(self, validated_token):
+        ttl = settings.JWT_USER_CACHE_TTL
+        if not ttl:
+            return super().get_user(validated_token)
+
+        key = (validated_token.get(api_settings.USER_ID_CLAIM), validated_token.get(api_settings.JTI_CLAIM))
+        user = user_cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(key, user, ttl)
+        return user
+
+
+class StreamToken(Token):
+    """
+    Short-lived token that only opens event streams. EventSource can not set headers, so it is sent
+    as ?token= and ends up in access logs, where an access token would stay valid for a day
+    """
+    token_type = 'stream'
+    lifetime = settings.EVENTS_TOKEN_LIFETIME
+
+
+def authenticate_stream(request):
+    """
+    User of a plain Django request to a streaming view or None: the bearer token,
+    a StreamToken in ?token= for EventSource, then the session
+    """
+    auth = JWTAuthentication()
+    try:
+        if token := request.GET.get('token'):
+            return auth.get_user(StreamToken(token))
+        if result := auth.authenticate(request):
+            return result[0]
+    except (AuthenticationFailed, TokenError):
+        return None
+    return request.user if request.user.is_authenticated else None
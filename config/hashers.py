@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import connection
+
+_executor = None
+
+
+class HashingBusy(Exception):
+    """
+    A login or sign-up waited PASSWORD_HASHING_TIMEOUT in the hashing pool queue
+    """
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASHING_WORKERS,
+                                       thread_name_prefix='password-hashing')
+    return _executor
+
+
+def run_in_pool(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        connection.close()
+
+
+async def run_in_hashing_pool(func, *args, **kwargs):
+    """
+    Await func in the hashing pool, off the thread that runs the sync ORM work of async views.
+    Raises HashingBusy when it did not start within PASSWORD_HASHING_TIMEOUT, a started call is awaited to the end
+    """
+    context = contextvars.copy_context()
+    future = get_executor().submit(context.run, run_in_pool, func, *args, **kwargs)
+    waiter = asyncio.wrap_future(future)
+    try:
+        return await asyncio.wait_for(asyncio.shield(waiter), settings.PASSWORD_HASHING_TIMEOUT)
+    except asyncio.TimeoutError:
+        if future.cancel():
+            raise HashingBusy
+    return await waiter
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Costs from PASSWORD_ARGON2_*, hashes with other costs are updated on the next login
+    """
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
+
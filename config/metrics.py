@@ -0,0 +1,153 @@
+"""
+Per-request performance metrics: latency, DB queries and named spans (serialize, template, email),
+plus rolling per-endpoint percentiles of this process, see PerformanceMiddleware
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+
+class RequestMetrics:
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.spans = defaultdict(float)
+        self.active = set()
+
+    @property
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def add(self, name, ms):
+        self.spans[name] += ms
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    connection.execute_wrapper() counting queries and their time into the current request metrics.
+    Installed on every connection, async views query from worker threads with their own connections
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.add('db', (time.perf_counter() - started) * 1000)
+
+
+def install_query_timer(connection):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@receiver(connection_created)
+def connection_created_handler(sender, connection, **kwargs):
+    install_query_timer(connection)
+
+
+@contextmanager
+def span(name):
+    """
+    Add the time of the block to the current request, a no-op outside of requests.
+    Nested spans of the same name are counted once
+    """
+    metrics = current_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.active.discard(name)
+        metrics.add(name, (time.perf_counter() - started) * 1000)
+
+
+def timed(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TimedSerializerMixin:
+    """
+    Counts building serializer.data as the "serialize" span
+    """
+
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of sorted values
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class EndpointStats:
+    """
+    Last PERFORMANCE_WINDOW requests of every endpoint in this process, thread-safe.
+    Every worker process keeps its own window
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, endpoint, metrics, total_ms):
+        sample = (total_ms, metrics.spans.get('db', 0.0), metrics.queries)
+        with self.lock:
+            if endpoint not in self.samples:
+                self.samples[endpoint] = deque(maxlen=settings.PERFORMANCE_WINDOW)
+            self.samples[endpoint].append(sample)
+
+    def snapshot(self):
+        with self.lock:
+            samples = {endpoint: list(window) for endpoint, window in self.samples.items()}
+
+        stats = {}
+        for endpoint, window in sorted(samples.items()):
+            latencies = sorted(sample[0] for sample in window)
+            db = sorted(sample[1] for sample in window)
+            stats[endpoint] = {
+                'count': len(window),
+                'p50_ms': round(percentile(latencies, 0.50), 2),
+                'p95_ms': round(percentile(latencies, 0.95), 2),
+                'p99_ms': round(percentile(latencies, 0.99), 2),
+                'db_p95_ms': round(percentile(db, 0.95), 2),
+                'queries_avg': round(sum(sample[2] for sample in window) / len(window), 1),
+                'queries_max': max(sample[2] for sample in window),
+            }
+        return stats
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+endpoint_stats = EndpointStats()
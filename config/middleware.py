@@ -1,36 +1,141 @@
-from datetime import timedelta, datetime
+import json
+import logging
 
-from rest_framework_simplejwt import authentication
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 
 from django.conf import settings
-from django.utils import timezone
+from django.db import connections
 
+from accounts.activity import last_activity, last_login
 from accounts.models import User
+from .authentication import JWTAuthentication
+from .metrics import RequestMetrics, current_metrics, endpoint_stats, install_query_timer
+
+logger = logging.getLogger(__name__)
+performance_logger = logging.getLogger('config.performance')
 
 
 class LastActivityMiddleware:
+    """
+    Buffers the time of the user's last request in memory, see accounts.activity,
+    and flushes it together with buffered logins.
+    Token requests never touch the session, the validated token is reused by DRF.
+    """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        if request.user and request.user.is_anonymous:
-            try:
-                request.user = authentication.JWTAuthentication().authenticate(request)[0]  # Manually authenticate the token
-            except Exception as e:
-                pass  # do nothing when accessing docs or admin pages
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
 
-        if request.user.is_authenticated:
-            last_activity = request.session.get('last-activity', None)
+        if user_id := self.get_user_id(request):
+            last_activity.record(user_id)
+        response = self.get_response(request)
+        self.flush()
+        return response
 
-            too_old_time = datetime.now() - timedelta(seconds=settings.LAST_ACTIVITY_INTERVAL)
-            if not last_activity or datetime.strptime(last_activity, "%Y%m%d %H:%M:%S") < too_old_time:
-                User.objects.filter(id=request.user.id).update(
-                    last_activity=timezone.now())
+    async def __acall__(self, request):
+        # session clients load the user from the DB
+        if user_id := await sync_to_async(self.get_user_id)(request):
+            last_activity.record(user_id)
+        response = await self.get_response(request)
+        if any(buffer.should_flush() for buffer in (last_activity, last_login)):
+            await sync_to_async(self.flush)()
+        return response
 
-            request.session['last-activity'] = datetime.now().strftime("%Y%m%d %H:%M:%S")
+    def flush(self):
+        for buffer in (last_activity, last_login):
+            if buffer.should_flush():
+                try:
+                    buffer.flush()
+                except Exception as e:
+                    # the response is ready, the timestamps were put back for the next flush
+                    logger.error(e, exc_info=True)
 
-        response = self.get_response(request)
+    def get_user_id(self, request):
+        auth = JWTAuthentication()
+        if auth.get_header(request) is None:
+            # session clients, the user is loaded by SessionAuthentication anyway
+            return request.user.id if request.user.is_authenticated else None
+
+        try:
+            validated_token = auth.get_request_token(request)
+        except AuthenticationFailed:
+            return None  # invalid token or malformed header, DRF responds with 401
+        if validated_token is None or api_settings.USER_ID_CLAIM not in validated_token:
+            return None
+        return User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+
+
+class PerformanceMiddleware:
+    """
+    Measures every request: total latency, DB queries and their time, and the spans of config.metrics.
+    Adds a Server-Timing header, logs one JSON line per request to config.performance
+    and feeds the per-endpoint percentiles of config.metrics.endpoint_stats.
+    Streaming responses are measured until the response starts
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # connections opened later get the timer from the connection_created signal
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        total_ms = metrics.elapsed_ms
+        endpoint = self.get_endpoint(request)
+        endpoint_stats.record(endpoint, metrics, total_ms)
+
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = self.server_timing(metrics, total_ms)
+        performance_logger.info(json.dumps({
+            'endpoint': endpoint,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'queries': metrics.queries,
+            **{f'{name}_ms': round(ms, 2) for name, ms in metrics.spans.items()},
+        }))
         return response
 
+    def get_endpoint(self, request):
+        match = request.resolver_match
+        return f'{request.method} /{match.route}' if match is not None else f'{request.method} <unmatched>'
 
+    def server_timing(self, metrics, total_ms):
+        db_ms = metrics.spans.get('db', 0.0)
+        timings = [f'total;dur={total_ms:.1f}', f'db;dur={db_ms:.1f};desc="{metrics.queries} queries"']
+        timings += [f'{name};dur={ms:.1f}' for name, ms in metrics.spans.items() if name != 'db']
+        return ', '.join(timings)
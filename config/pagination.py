@@ -0,0 +1,86 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class TimelineCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (created_at, id), backed by a composite index
+    """
+    ordering = ('created_at', 'id')
+    page_size_query_param = 'limit'
+
+
+class TimelinePagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default for backwards compatibility.
+
+    ?cursor=<token> or ?pagination=cursor switches to keyset pagination,
+    ?count=false skips the COUNT(*) query in limit/offset mode.
+    """
+    cursor_pagination_class = TimelineCursorPagination
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+    # these params order results their own way, e.g. by search rank
+    offset_only_query_params = ('search',)
+
+    cursor_paginator = None
+    include_count = True
+    has_next = False
+
+    def use_cursor(self, request):
+        if any(param in request.query_params for param in self.offset_only_query_params):
+            return False
+        return (
+            self.cursor_pagination_class.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+
+        self.include_count = request.query_params.get(self.count_query_param, '').lower() not in ('false', '0')
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.request = request
+
+        # fetch one extra row to find out whether there is a next page
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_next_link(self):
+        if self.include_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if self.include_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
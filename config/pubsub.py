@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """
+    Messages of one channel for a consumer running in an asyncio event loop
+    """
+    # sent instead of the dropped messages when the consumer falls behind, it should refetch
+    overflow_message = {'event': 'resync'}
+
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+
+    def put(self, message):
+        """
+        Thread-safe, called by the broker from any thread
+        """
+        try:
+            self.loop.call_soon_threadsafe(self.put_nowait, message)
+        except RuntimeError:
+            # the event loop is closed
+            self.close()
+
+    def put_nowait(self, message):
+        if self.queue.full():
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = self.overflow_message
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In-process pub/sub, reaches subscribers of this process only.
+    A broker for several processes implements the same publish/subscribe/unsubscribe/has_subscribers methods
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize or settings.EVENTS_QUEUE_SIZE
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(message)
+
+    def has_subscribers(self):
+        """
+        Whether any channel has a subscriber, publishers skip building messages otherwise
+        """
+        return bool(self.subscriptions)
+
+    def subscribe(self, channel):
+        """
+        Call from a coroutine, messages are delivered to its event loop
+        """
+        subscription = Subscription(self, channel, self.maxsize)
+        with self.lock:
+            self.subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.channel, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self.subscriptions.pop(subscription.channel, None)
+
+
+@lru_cache(maxsize=None)
+def load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return load_broker(settings.EVENTS_BROKER)
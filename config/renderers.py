@@ -0,0 +1,50 @@
+from rest_framework.renderers import JSONRenderer
+
+from django.conf import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders the same bytes as JSONRenderer, with orjson when it is installed.
+    Indented output and types orjson does not know fall back to JSONRenderer.
+
+    orjson writes exponents of floats differently (1e16, not 1e+16), use it for payloads without floats
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.default, option=self.options)
+        except (TypeError, orjson.JSONEncodeError):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # same escaping of line and paragraph separators as JSONRenderer
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def default(self, obj):
+        return self.encoder_class().default(obj)
+
+
+class FastReadMixin:
+    """
+    Opt-in fast read path of a view, enabled by settings.FAST_READ_SERIALIZERS.
+    GET builds plain dicts instead of running serializers and renders them with FastJSONRenderer
+    """
+
+    @property
+    def fast_read(self):
+        return settings.FAST_READ_SERIALIZERS and self.request.method == 'GET'
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if not settings.FAST_READ_SERIALIZERS:
+            return renderers
+        return [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
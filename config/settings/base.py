@@ -10,6 +10,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 load_dotenv(os.path.join(BASE_DIR, 'config', '.env'))
 
 SECRET_KEY = os.environ.get('SECRET_KEY')
+# signs access and refresh tokens, rotating it logs everyone out but keeps sessions and password resets valid
+JWT_SIGNING_KEY = os.environ.get('JWT_SIGNING_KEY') or SECRET_KEY
 
 DEBUG = True
 
@@ -32,9 +34,11 @@ INSTALLED_APPS = [
 
     'accounts',
     'tasks',
+    'mailing',
 ]
 
 MIDDLEWARE = [
+    'config.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,7 +73,7 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'config.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication'
     ),
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
@@ -83,24 +87,56 @@ REST_FRAMEWORK = {
     'DATETIME_FORMAT': "%Y-%m-%d %H:%M:%S"
 }
 
-LAST_ACTIVITY_INTERVAL = 600
+# build GET payloads of task and user lists from .values() rows instead of serializers, see config.renderers
+FAST_READ_SERIALIZERS = os.environ.get('FAST_READ_SERIALIZERS', '').lower() in ('1', 'true')
+
+# mount the async views of tasks.asyncviews and accounts.asyncviews,
+# for ASGI servers such as gunicorn with uvicorn workers, opt-in, see the README
+TASK_ASYNC_VIEWS = os.environ.get('TASK_ASYNC_VIEWS', '').lower() in ('1', 'true')
+
+TASK_BULK_MAX_ITEMS = 5000
+TASK_BULK_BATCH_SIZE = 500
+TASK_EXPORT_CHUNK_SIZE = 2000  # rows per server-side cursor fetch of task exports
+TASK_IMPORT_BATCH_SIZE = 5000  # tasks per COPY/bulk_create batch of import_tasks
+TASK_SYNC_PAGE_SIZE = 100
+TASK_SYNC_MAX_PAGE_SIZE = 1000
+TASK_SYNC_OVERLAP = 5  # seconds a caught up sync looks back for late commits
+TASK_SYNC_TOMBSTONE_DAYS = 30  # older tombstones are pruned and older sync tokens expire
+
+# pub/sub of the task event stream, LocalBroker only reaches clients connected to the same process
+EVENTS_BROKER = 'config.pubsub.LocalBroker'
+EVENTS_QUEUE_SIZE = 100  # undelivered events per client before it is told to resync
+EVENTS_KEEPALIVE = 15  # seconds between keepalive comments of idle event streams
+EVENTS_TOKEN_LIFETIME = timedelta(minutes=1)  # ?token= of event streams, only checked when the stream opens
+
+PERFORMANCE_WINDOW = 1000  # latest requests per endpoint kept for percentiles, per process
+PERFORMANCE_SERVER_TIMING = True  # Server-Timing header with total, db, serialize, template and email times
+
+LAST_ACTIVITY_INTERVAL = 600  # seconds between bulk writes of buffered last_activity and last_login
 
 SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
-    'SIGNING_KEY': SECRET_KEY,
-    'VERIFYING_KEY': SECRET_KEY,
+    'SIGNING_KEY': JWT_SIGNING_KEY,
+    'VERIFYING_KEY': JWT_SIGNING_KEY,
     'AUDIENCE': None,
     'ISSUER': None,
     'EXP_CLAIM': 'exp',
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,  # buffered by accounts.activity.last_login instead
 
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
 }
 
+JWT_USER_CACHE_TTL = 0  # seconds to reuse users loaded for the same token, 0 disables the cache
+JWT_TOKEN_CACHE_TTL = 300  # seconds to reuse verified tokens, never past their exp, 0 disables the cache
+JWT_TOKEN_CACHE_SIZE = 4096  # verified tokens per process
+# GET/HEAD/OPTIONS get a user built from the token claims and only load it from the DB when needed,
+# deactivated users then keep read access until their access token expires
+JWT_STATELESS_READS = False
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -119,10 +155,16 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 EMAIL_PORT = 587
 EMAIL_USE_TLS = True
+EMAIL_MAX_RECIPIENTS = 50  # per message, larger recipient lists are split
+
+# Outbox delivery, see `manage.py send_queued_email`
+MAILING_EMAIL_BACKEND = None  # falls back to EMAIL_BACKEND
+MAILING_MAX_ATTEMPTS = 5
+MAILING_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': os.environ.get('DB_ENGINE') or 'django.db.backends.postgresql',
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
@@ -137,6 +179,27 @@ AUTHENTICATION_BACKENDS = [
     'rest_framework.authentication.SessionAuthentication'
 ]
 
+# argon2, bcrypt or pbkdf2, see config.hashers. Hashes made by the other ones or with other costs
+# still verify and are rehashed with the preferred hasher on the next login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER') or 'argon2'
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'config.hashers.Argon2PasswordHasher',
+    'bcrypt': 'config.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'config.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 19456  # KiB
+PASSWORD_ARGON2_PARALLELISM = 1
+PASSWORD_BCRYPT_ROUNDS = 10
+PASSWORD_PBKDF2_ITERATIONS = None  # Django's default
+# threads of the hashing pool of the async login and sign-up views, see config.hashers. Sync workers serve one
+# request per thread and hash inline, so these only apply with TASK_ASYNC_VIEWS
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_TIMEOUT = 10  # seconds a login or sign-up waits in the pool queue before a 429
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -175,8 +238,18 @@ STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT') or os.path.join(BASE_DIR, 'media/')
 UPLOAD_DIR = MEDIA_ROOT
+REQUEST_BODY_MAX_SIZE = 10000000  # bytes, larger bodies get a 413 from config.asgi before they are spooled
+
+# Attachment processing, see tasks.images
+ATTACHMENT_MAX_SIZE = 5000000  # bytes
+ATTACHMENT_CONTENT_ADDRESSED = True  # store identical uploads once, named by SHA-256
+ATTACHMENT_PROCESSING_ASYNC = True
+ATTACHMENT_PROCESSING_WORKERS = 2
+ATTACHMENT_THUMBNAIL_SIZE = (320, 320)
+ATTACHMENT_WEBP_SIZE = (1280, 1280)
+ATTACHMENT_WEBP_QUALITY = 80
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
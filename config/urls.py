@@ -7,6 +7,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include, re_path
 
+from config.views import PerformanceStatsView
+
 schema_view = get_schema_view(
    openapi.Info(
       title="TODO",
@@ -21,6 +23,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/', include('accounts.urls')),
     path('tasks/', include('tasks.urls')),
+    path('metrics/performance/', PerformanceStatsView.as_view(), name='performance_stats'),
 
     re_path('docs/swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     re_path('docs/redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
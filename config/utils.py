@@ -1,9 +1,11 @@
 from rest_framework.views import exception_handler
 
 from django.template.loader import get_template
-from django.core.mail import EmailMessage
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
 
+from .metrics import span, timed
+
 
 def custom_exception_handler(exc, context):
     # Call REST framework's default exception handler first,
@@ -20,12 +22,50 @@ def custom_exception_handler(exc, context):
     return response
 
 
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+@timed('template')
+def render_email(template, content):
+    # compiled templates are kept by Django's cached loader, which also reloads them in development
+    return get_template(template).render(content)
+
+
+def build_email_messages(subject, to, body, from_email=settings.DEFAULT_FROM_EMAIL, connection=None):
+    """
+    Build html messages, splitting large recipient lists into several emails
+    """
+    messages = []
+    for recipients in chunks(to, settings.EMAIL_MAX_RECIPIENTS):
+        msg = EmailMessage(subject, body, from_email=from_email, bcc=recipients, connection=connection)
+        msg.content_subtype = 'html'
+        messages.append(msg)
+    return messages
+
+
 def send_email(subject, user, template, content, from_email=settings.DEFAULT_FROM_EMAIL):
-    to = user if isinstance(user, list) else [user]
-    # ctx = {'content': content}
+    send_bulk_email([{'subject': subject, 'user': user, 'template': template, 'content': content}],
+                    from_email=from_email)
+
 
-    message = get_template(template).render(content)
-    msg = EmailMessage(subject, message, from_email=from_email, bcc=to)
+def send_bulk_email(messages, from_email=settings.DEFAULT_FROM_EMAIL, connection=None):
+    """
+    Send many emails over a single connection.
+    `messages` is an iterable of dicts with send_email arguments: subject, user, template, content.
+    Returns the number of sent emails
+    """
+    emails = []
+    for message in messages:
+        user = message['user']
+        to = user if isinstance(user, list) else [user]
+        body = render_email(message['template'], message['content'])
+        emails.extend(build_email_messages(message['subject'], to, body,
+                                           from_email=message.get('from_email', from_email)))
+    if not emails:
+        return 0
 
-    msg.content_subtype = 'html'
-    msg.send()
+    connection = connection or get_connection()
+    with span('email'):
+        return connection.send_messages(emails) or 0
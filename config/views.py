@@ -0,0 +1,28 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+
+from .metrics import endpoint_stats
+
+
+class PerformanceStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    @swagger_auto_schema(
+        operation_id='performance_stats',
+        operation_description='Latency percentiles and query counts per endpoint over the latest '
+                              'PERFORMANCE_WINDOW requests of the worker process that answers',
+        responses={200: 'Stats by endpoint', 403: 'Staff only'},
+    )
+    def get(self, request):
+        return Response(endpoint_stats.snapshot())
+
+    @swagger_auto_schema(
+        operation_id='performance_stats_reset',
+        operation_description='Start a new window on the worker process that answers',
+        responses={204: '', 403: 'Staff only'},
+    )
+    def delete(self, request):
+        endpoint_stats.clear()
+        return Response(status=204)
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from mailing.utils import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--interval', type=float, default=5, help='seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='drain the outbox and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_queued_emails(batch_size=options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'sent: {sent}, failed: {failed}')
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from config.utils import send_bulk_email
+from .models import OutgoingEmail
+from .utils import queue_email, send_queued_emails
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP is down')
+
+
+class CountingBackend(EmailBackend):
+    connections = 0
+
+    def send_messages(self, messages):
+        CountingBackend.connections += 1
+        return super().send_messages(messages)
+
+
+class OutboxTests(TestCase):
+
+    def queue(self, user='executor@test.com'):
+        return queue_email(subject='New task', user=user, template='add_executor.html',
+                           content={'full_name': 'Exec', 'task_title': 'Task', 'task_link': ''})
+
+    def test_queue_email_does_not_send(self):
+        email = self.queue()
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.recipients, ['executor@test.com'])
+        self.assertIn('Task', email.body)
+
+    def test_worker_sends_batch(self):
+        for i in range(3):
+            self.queue(f'executor{i}@test.com')
+
+        call_command('send_queued_email', '--once', stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[0].content_subtype, 'html')
+        self.assertFalse(OutgoingEmail.objects.exclude(status=OutgoingEmail.SENT).exists())
+
+    def test_batch_size(self):
+        for i in range(3):
+            self.queue(f'executor{i}@test.com')
+
+        self.assertEqual(send_queued_emails(batch_size=2), (2, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (1, 0))
+        self.assertEqual(send_queued_emails(batch_size=2), (0, 0))
+
+    @override_settings(MAILING_EMAIL_BACKEND='mailing.tests.FailingBackend', MAILING_MAX_ATTEMPTS=2,
+                       MAILING_RETRY_DELAY=60)
+    def test_retry_with_backoff(self):
+        email = self.queue()
+
+        self.assertEqual(send_queued_emails(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('SMTP is down', email.last_error)
+        self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=50))
+
+        # not due yet
+        self.assertEqual(send_queued_emails(), (0, 0))
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        send_queued_emails()
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+
+
+@override_settings(EMAIL_BACKEND='mailing.tests.CountingBackend', EMAIL_MAX_RECIPIENTS=2)
+class BulkEmailTests(TestCase):
+
+    def setUp(self):
+        CountingBackend.connections = 0
+
+    def test_send_bulk_email_uses_one_connection(self):
+        messages = [
+            {'subject': 'New task', 'user': f'executor{i}@test.com', 'template': 'add_executor.html',
+             'content': {'full_name': f'Exec {i}', 'task_title': 'Task', 'task_link': ''}}
+            for i in range(5)
+        ]
+
+        self.assertEqual(send_bulk_email(messages), 5)
+        self.assertEqual(CountingBackend.connections, 1)
+        self.assertIn('Exec 4', mail.outbox[4].body)
+
+    def test_large_recipient_lists_are_chunked(self):
+        users = [f'executor{i}@test.com' for i in range(5)]
+        send_bulk_email([{'subject': 'Digest', 'user': users, 'template': 'add_executor.html', 'content': {}}])
+
+        self.assertEqual([len(msg.bcc) for msg in mail.outbox], [2, 2, 1])
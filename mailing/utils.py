@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from config.utils import render_email, build_email_messages
+from .models import OutgoingEmail
+
+
+def queue_email(subject, user, template, content, from_email=settings.DEFAULT_FROM_EMAIL):
+    """
+    Render an email and store it in the outbox, the worker delivers it later
+    """
+    to = user if isinstance(user, list) else [user]
+    body = render_email(template, content)
+    return OutgoingEmail.objects.create(subject=subject, body=body, from_email=from_email or '', recipients=to)
+
+
+def queue_bulk_email(messages, from_email=settings.DEFAULT_FROM_EMAIL):
+    """
+    Store many emails in the outbox with one query.
+    `messages` is an iterable of dicts with queue_email arguments: subject, user, template, content
+    """
+    emails = []
+    for message in messages:
+        user = message['user']
+        emails.append(OutgoingEmail(
+            subject=message['subject'],
+            body=render_email(message['template'], message['content']),
+            from_email=message.get('from_email', from_email) or '',
+            recipients=user if isinstance(user, list) else [user],
+        ))
+    return OutgoingEmail.objects.bulk_create(emails)
+
+
+def get_delivery_connection():
+    return get_connection(backend=settings.MAILING_EMAIL_BACKEND)
+
+
+def schedule_retry(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.MAILING_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+    else:
+        delay = settings.MAILING_RETRY_DELAY * 2 ** (email.attempts - 1)
+        email.next_attempt_at = now + timedelta(seconds=delay)
+
+
+def send_queued_emails(batch_size=50):
+    """
+    Deliver one batch of due emails over a single connection.
+    Returns the number of sent and failed emails
+    """
+    now = timezone.now()
+    sent = failed = 0
+
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if not emails:
+            return sent, failed
+
+        connection = get_delivery_connection()
+        try:
+            connection.open()
+        except Exception as e:
+            for email in emails:
+                schedule_retry(email, e, now)
+            failed = len(emails)
+        else:
+            try:
+                for email in emails:
+                    try:
+                        connection.send_messages(build_email_messages(
+                            email.subject, email.recipients, email.body,
+                            from_email=email.from_email or None, connection=connection))
+                    except Exception as e:
+                        schedule_retry(email, e, now)
+                        failed += 1
+                    else:
+                        email.status = OutgoingEmail.SENT
+                        email.sent_at = timezone.now()
+                        sent += 1
+            finally:
+                connection.close()
+
+        OutgoingEmail.objects.bulk_update(
+            emails, ['status', 'attempts', 'last_error', 'next_attempt_at', 'sent_at'])
+
+    return sent, failed
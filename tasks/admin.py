@@ -1,7 +1,8 @@
 from django.contrib import admin
 
-from .models import Task, Executor, Attachment
+from .models import Task, Executor, Attachment, Tombstone
 
 admin.site.register(Task)
 admin.site.register(Executor)
 admin.site.register(Attachment)
+admin.site.register(Tombstone)
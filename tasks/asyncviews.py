@@ -0,0 +1,123 @@
+"""
+Async versions of the views of tasks.views under the same names, mounted with TASK_ASYNC_VIEWS.
+Simple reads use the async ORM, transactions, DRF pagination and serializers with lazy queries
+run in one worker thread hop each, so slow clients and uploads never block the event loop
+"""
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions, status
+from rest_framework.response import Response
+
+from django.http import StreamingHttpResponse
+
+from accounts.serializers import UserSerializer
+from config.asyncviews import AsyncAPIViewMixin, aiterate
+from . import views
+from .export import EXPORT_FORMATS, export_lines, iter_tasks
+from .filters import filter_tasks
+from .models import Task, Attachment
+from .views import TaskEventsView, TaskEventsTokenView  # noqa: F401, async already or trivial
+
+
+class TaskListView(AsyncAPIViewMixin, views.TaskListView):
+
+    async def get(self, request, *args, **kwargs):
+        return await sync_to_async(self.list)(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(self.create)(request, *args, **kwargs)
+
+
+class TaskView(AsyncAPIViewMixin, views.TaskView):
+
+    async def get(self, request, *args, **kwargs):
+        updated_at = await self.version_queryset().afirst()
+        if not_modified := self.get_not_modified(updated_at):
+            return not_modified
+        return self.set_validators(Response(await sync_to_async(self.get_data)(kwargs['pk'], updated_at)), updated_at)
+
+
+class TaskBulkView(AsyncAPIViewMixin, views.TaskBulkView):
+    pass
+
+
+class TaskSyncView(AsyncAPIViewMixin, views.TaskSyncView):
+    pass
+
+
+class TaskExportView(AsyncAPIViewMixin, views.TaskExportView):
+
+    async def get(self, request, export_format):
+        queryset = filter_tasks(Task.objects.all(), request.query_params, request.user.id)
+        lines = export_lines(export_format, iter_tasks(queryset))
+        response = StreamingHttpResponse(aiterate(lines), content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+
+class TaskExecutorView(AsyncAPIViewMixin, views.TaskExecutorView):
+
+    async def aget_task(self, task_id):
+        try:
+            task = await Task.objects.only('id', 'author_id', 'title').aget(id=task_id)
+        except Task.DoesNotExist:
+            raise exceptions.NotFound('Task does not exist')
+
+        if task.author_id != self.request.user.id:
+            raise exceptions.PermissionDenied('You are not author of this task')
+        return task
+
+    async def aget_users(self, task_id):
+        user_ids = self.get_user_ids()
+        return user_ids, [user async for user in self.users_queryset(task_id, user_ids)]
+
+    async def aexecutors_response(self, task_id):
+        users = [executor.user async for executor in self.executors_queryset(task_id)]
+        return Response(UserSerializer(users, many=True).data, status=status.HTTP_200_OK)
+
+    async def post(self, request, task_id, *args, **kwargs):
+        task = await self.aget_task(task_id)
+        user_ids, users = await self.aget_users(task_id)
+
+        if new_users := self.validate_new_users(user_ids, users):
+            # executors, events and the queued emails commit together
+            await sync_to_async(self.add_executors)(task, new_users)
+        return await self.aexecutors_response(task.id)
+
+    async def delete(self, request, task_id):
+        task = await self.aget_task(task_id)
+        user_ids, users = await self.aget_users(task_id)
+
+        self.validate_removed_users(user_ids, users)
+        await sync_to_async(self.remove_executors)(task, user_ids, users)
+        return await self.aexecutors_response(task.id)
+
+
+class CreateAttachmentView(AsyncAPIViewMixin, views.CreateAttachmentView):
+
+    async def post(self, request, task_id):
+        try:
+            task = await Task.objects.aget(id=task_id)
+        except Task.DoesNotExist:
+            raise exceptions.NotFound('Task does not exist')
+
+        if task.author_id != request.user.id:
+            raise exceptions.PermissionDenied('You are not author of this task')
+
+        # parsing and hashing the upload, then storing it and Pillow work without
+        # ATTACHMENT_PROCESSING_ASYNC, happen in a worker thread
+        image = await sync_to_async(self.get_image)()
+        return await sync_to_async(self.attach)(task, image)
+
+
+class DeleteAttachmentView(AsyncAPIViewMixin, views.DeleteAttachmentView):
+
+    async def delete(self, request, *args, **kwargs):
+        try:
+            attachment = await Attachment.objects.select_related('task').aget(id=kwargs['pk'])
+        except Attachment.DoesNotExist:
+            raise exceptions.NotFound('Attachment does not exist')
+
+        if attachment.task.author_id != request.user.id:
+            raise exceptions.PermissionDenied('You are not author of this task')
+        await attachment.adelete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
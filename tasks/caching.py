@@ -0,0 +1,55 @@
+import hashlib
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .models import Task
+
+
+def task_cache_key(task_id):
+    return f'tasks:task:{task_id}'
+
+
+def task_etag(task_id, updated_at):
+    return quote_etag(f'{task_id}-{updated_at.timestamp()}')
+
+
+def task_list_etag(path, rows, envelope):
+    """
+    ETag of a list page: the request, the pagination envelope and the version of every listed task
+    """
+    versions = ','.join(f"{row['id']}-{row['updated_at'].timestamp()}" for row in rows)
+    meta = ','.join(f'{key}={value}' for key, value in envelope.items() if key != 'results')
+    return quote_etag(hashlib.md5(f'{path}|{meta}|{versions}'.encode()).hexdigest())
+
+
+def get_cached_task(task_id, updated_at, base_url):
+    """
+    Serialized task payload, only if it was cached for the same version and base url,
+    file urls in the payload are absolute
+    """
+    cached = cache.get(task_cache_key(task_id))
+    if cached and cached['updated_at'] == updated_at and cached['base_url'] == base_url:
+        return cached['data']
+    return None
+
+
+def set_cached_task(task_id, updated_at, base_url, data):
+    cache.set(task_cache_key(task_id), {'updated_at': updated_at, 'base_url': base_url, 'data': data})
+
+
+def invalidate_task(task_id):
+    cache.delete(task_cache_key(task_id))
+
+
+def invalidate_tasks(task_ids):
+    cache.delete_many([task_cache_key(task_id) for task_id in task_ids])
+
+
+def touch_tasks(task_ids):
+    """
+    Bump updated_at of tasks whose executors or attachments changed
+    """
+    Task.objects.filter(id__in=task_ids).update(updated_at=timezone.now())
+    invalidate_tasks(task_ids)
@@ -0,0 +1,110 @@
+"""
+Task change events for the event stream, see TaskEventsView.
+
+Events are buffered until the transaction commits, then published in one batch to the
+author and executors of every task. Audiences are resolved with two queries per batch,
+only while the broker has subscribers.
+"""
+import json
+import threading
+import weakref
+
+from django.db import transaction
+
+from config.pubsub import get_broker
+from .models import Task, Executor
+
+CREATED = 'task.created'
+UPDATED = 'task.updated'
+DELETED = 'task.deleted'
+EXECUTORS = 'task.executors'
+
+
+class EventBatch(list):
+    """
+    Events of one transaction or savepoint, registered as its commit hook
+    """
+
+    def __init__(self, savepoint_ids):
+        super().__init__()
+        self.savepoint_ids = savepoint_ids
+
+    def __call__(self):
+        if buffer.batches.get(self.savepoint_ids) is self:
+            del buffer.batches[self.savepoint_ids]
+        flush(self)
+
+
+class EventBuffer(threading.local):
+
+    def __init__(self):
+        # pending batches by the savepoints they were registered in. Only Django's list of commit hooks
+        # holds a batch, so the batch of a rolled back transaction or savepoint is collected and drops out
+        self.batches = weakref.WeakValueDictionary()
+
+
+buffer = EventBuffer()
+
+
+def user_channel(user_id):
+    return f'tasks.user.{user_id}'
+
+
+def publish_task_events(event, task_ids, **data):
+    """
+    Publish an event for every task after the transaction commits,
+    `users` in data are notified on top of the task author and executors
+    """
+    events = [(event, task_id, data) for task_id in task_ids]
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return flush(events)
+
+    # one batch per savepoint, so events of a rolled back savepoint are dropped together with its hook
+    savepoint_ids = tuple(connection.savepoint_ids)
+    batch = buffer.batches.get(savepoint_ids)
+    if batch is None:
+        batch = buffer.batches[savepoint_ids] = EventBatch(savepoint_ids)
+        transaction.on_commit(batch)
+    batch.extend(events)
+
+
+def flush(events):
+    broker = get_broker()
+    if not events or not broker.has_subscribers():
+        return
+
+    task_ids = {task_id for _, task_id, _ in events}
+    audience = {task_id: {author_id} for task_id, author_id in
+                Task.objects.filter(id__in=task_ids).values_list('id', 'author_id')}
+    for task_id, user_id in Executor.objects.filter(task__in=audience).values_list('task_id', 'user_id'):
+        audience[task_id].add(user_id)
+
+    messages = []
+    changed = set()
+    deleted = {}
+    for event, task_id, data in events:
+        users = set(data.get('users', ()))
+        if task_id not in audience:
+            # every event of a deleted task tells its former audience that it is gone
+            deleted.setdefault(task_id, set()).update(users)
+            continue
+        if event in (CREATED, UPDATED):
+            # a single create or update per task and batch
+            if task_id in changed:
+                continue
+            changed.add(task_id)
+        message = {'event': event, 'task_id': task_id, **{key: value for key, value in data.items() if key != 'users'}}
+        messages.append((message, audience[task_id] | users))
+    messages += [({'event': DELETED, 'task_id': task_id}, users) for task_id, users in deleted.items()]
+
+    for message, users in messages:
+        for user_id in users:
+            broker.publish(user_channel(user_id), message)
+
+
+def format_event(message):
+    """
+    Server-Sent Events frame
+    """
+    return f'event: {message["event"]}\ndata: {json.dumps(message)}\n\n'
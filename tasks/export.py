@@ -0,0 +1,74 @@
+import csv
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Task, Executor, Attachment
+
+EXPORT_FIELDS = ('id', 'title', 'content', 'author', 'created_at', 'updated_at', 'executors', 'attachments')
+# separates emails and file names inside a CSV cell
+CSV_LIST_SEPARATOR = ';'
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_tasks(queryset=None, chunk_size=None):
+    """
+    Yield export rows of tasks ordered by id with a server-side cursor,
+    executors and attachments are resolved with one query each per chunk so memory stays constant
+    """
+    chunk_size = chunk_size or settings.TASK_EXPORT_CHUNK_SIZE
+    queryset = Task.objects.all() if queryset is None else queryset
+    rows = queryset.order_by('id').values_list(
+        'id', 'title', 'content', 'author__email', 'created_at', 'updated_at'
+    ).iterator(chunk_size=chunk_size)
+
+    while chunk := list(islice(rows, chunk_size)):
+        ids = [row[0] for row in chunk]
+        executors, attachments = {}, {}
+        for task_id, email in Executor.objects.filter(task__in=ids).order_by('id').values_list('task_id',
+                                                                                               'user__email'):
+            executors.setdefault(task_id, []).append(email)
+        for task_id, image in Attachment.objects.filter(task__in=ids).order_by('id').values_list('task_id', 'image'):
+            attachments.setdefault(task_id, []).append(image)
+
+        for row in chunk:
+            yield dict(zip(EXPORT_FIELDS, (*row, executors.get(row[0], []), attachments.get(row[0], []))))
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """
+    File-like object for csv.writer that returns what it is given instead of buffering it
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_value(value, encoder=DjangoJSONEncoder()):
+    if isinstance(value, list):
+        return CSV_LIST_SEPARATOR.join(value)
+    if isinstance(value, (str, int)):
+        return value
+    # datetimes in the same format as in NDJSON
+    return encoder.default(value)
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([csv_value(row[field]) for field in EXPORT_FIELDS])
+
+
+def export_lines(export_format, rows):
+    return ndjson_lines(rows) if export_format == 'ndjson' else csv_lines(rows)
@@ -0,0 +1,98 @@
+"""
+Read-only representations built from .values() rows, see settings.FAST_READ_SERIALIZERS.
+Output is the same as TasksSerializer's without instantiating serializers per row
+"""
+from rest_framework import serializers
+
+from accounts.fastserializers import get_full_name
+from config.metrics import timed
+from .models import Task, Executor, Attachment, count_subquery
+from .serializers import TasksSerializer, AttachmentSerializer, COUNT_FIELDS
+
+datetime_field = serializers.DateTimeField()
+ATTACHMENT_FILES = ('image', 'thumbnail', 'webp')
+COUNTED_MODELS = {'executors_count': Executor, 'attachments_count': Attachment}
+
+
+def format_datetime(value):
+    return datetime_field.to_representation(value)
+
+
+def file_url(field, name, request=None):
+    """
+    Same as FileField.to_representation() for a stored file name
+    """
+    if not name:
+        return None
+    url = field.storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def serialize_attachments(task_ids, request=None):
+    """
+    {task_id: [attachment, ...]} ordered by id
+    """
+    storage_fields = {name: Attachment._meta.get_field(name) for name in ATTACHMENT_FILES}
+    attachments = {}
+    for row in Attachment.objects.filter(task__in=task_ids).order_by('id').values(
+            'task_id', *AttachmentSerializer.Meta.fields):
+        for name, field in storage_fields.items():
+            row[name] = file_url(field, row[name], request)
+        attachments.setdefault(row.pop('task_id'), []).append(row)
+    return attachments
+
+
+def serialize_executors(task_ids):
+    """
+    {task_id: [executor, ...]} ordered by id, like TasksSerializer executors are rendered by UserSerializer
+    """
+    executors = {}
+    for task_id, executor_id, first_name, last_name in Executor.objects.filter(task__in=task_ids).order_by(
+            'id').values_list('task_id', 'id', 'user__first_name', 'user__last_name'):
+        executors.setdefault(task_id, []).append({'id': executor_id, 'full_name': get_full_name(first_name, last_name)})
+    return executors
+
+
+def get_field_names(fields=None):
+    names = [name for name in TasksSerializer.Meta.fields if fields is None or name in fields]
+    return names + [name for name in COUNT_FIELDS if fields is not None and name in fields]
+
+
+@timed('serialize')
+def serialize_tasks(ids, fields=None, request=None):
+    """
+    Task dicts in the order of ids, fields is a sparse fieldset from get_fieldset()
+    """
+    names = get_field_names(fields)
+    queryset = Task.objects.filter(id__in=ids)
+    for name, model in COUNTED_MODELS.items():
+        if name in names:
+            queryset = queryset.annotate(**{name: count_subquery(model)})
+
+    values = [name for name in names if name not in ('author', 'executors', 'attachments')]
+    if 'author' in names:
+        values += ['author_id', 'author__first_name', 'author__last_name']
+    rows = {row['id']: row for row in queryset.values(*values)}
+
+    executors = serialize_executors(ids) if 'executors' in names else {}
+    attachments = serialize_attachments(ids, request) if 'attachments' in names else {}
+
+    tasks = []
+    for task_id in ids:
+        if (row := rows.get(task_id)) is None:
+            continue
+        task = {}
+        for name in names:
+            if name == 'author':
+                task[name] = {'id': row['author_id'],
+                              'full_name': get_full_name(row['author__first_name'], row['author__last_name'])}
+            elif name == 'executors':
+                task[name] = executors.get(task_id, [])
+            elif name == 'attachments':
+                task[name] = attachments.get(task_id, [])
+            elif name in ('created_at', 'updated_at'):
+                task[name] = format_datetime(row[name])
+            else:
+                task[name] = row[name]
+        tasks.append(task)
+    return tasks
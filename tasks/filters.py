@@ -0,0 +1,104 @@
+from rest_framework import exceptions
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Attachment
+
+# largest BigAutoField id, bigger ones overflow the database integer
+MAX_ID = 2 ** 63 - 1
+
+DATETIME_FILTERS = {
+    'created_after': 'created_at__gte',
+    'created_before': 'created_at__lt',
+    'updated_after': 'updated_at__gte',
+    'updated_before': 'updated_at__lt',
+}
+
+
+def parse_user(value, user_id):
+    if value == 'me':
+        return user_id
+    try:
+        user = int(value)
+    except ValueError:
+        user = None
+    if user is None or not 0 < user <= MAX_ID:
+        raise exceptions.ValidationError(f'"{value}" is not a user id or "me"')
+    return user
+
+
+def parse_datetime_param(value):
+    # an unencoded "+" of the UTC offset arrives as a space
+    value = value.strip().replace(' ', '+')
+    try:
+        # well formed but impossible dates like 2024-02-30 raise ValueError
+        parsed = parse_datetime(value)
+        if parsed is None and (date := parse_date(value)):
+            parsed = timezone.datetime(date.year, date.month, date.day)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise exceptions.ValidationError(f'"{value}" is not an ISO 8601 date or datetime')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_tasks(queryset, params, user_id=None):
+    """
+    Apply task list filters from query params, every filter is backed by an index on Task or Executor
+    """
+    if author := params.get('author'):
+        queryset = queryset.filter(author=parse_user(author, user_id))
+
+    if executor := params.get('executor'):
+        # (user, task) unique index
+        queryset = queryset.filter(executors__user=parse_user(executor, user_id))
+
+    for param, lookup in DATETIME_FILTERS.items():
+        if value := params.get(param):
+            queryset = queryset.filter(**{lookup: parse_datetime_param(value)})
+
+    if has_attachments := params.get('has_attachments'):
+        if has_attachments.lower() not in ('true', 'false', '1', '0'):
+            raise exceptions.ValidationError('has_attachments must be true or false')
+        attachments = Exists(Attachment.objects.filter(task=OuterRef('pk')))
+        queryset = queryset.filter(attachments if has_attachments.lower() in ('true', '1') else ~attachments)
+
+    return queryset
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    ?author=<id|me>, ?executor=<id|me>, ?created_after=, ?created_before=, ?updated_after=,
+    ?updated_before= (ISO 8601) and ?has_attachments=true|false
+    """
+    params = ('author', 'executor', *DATETIME_FILTERS, 'has_attachments')
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_tasks(queryset, request.query_params, request.user.id)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {'name': param, 'required': False, 'in': 'query', 'schema': {'type': 'string'}}
+            for param in self.params
+        ]
+
+
+class TaskOrderingFilter(OrderingFilter):
+    """
+    ?ordering= over indexed fields only, ties are broken by id so pages stay stable
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if self.ordering_param not in request.query_params and request.query_params.get('search', '').strip():
+            # keep the search rank ordering
+            return None
+
+        ordering = super().get_ordering(request, queryset, view)
+        if ordering and not any(field.lstrip('-') == 'id' for field in ordering):
+            ordering = (*ordering, '-id' if ordering[0].startswith('-') else 'id')
+        return ordering
@@ -0,0 +1,183 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+
+from .caching import touch_tasks
+from .events import UPDATED, publish_task_events
+from .models import Attachment
+from .utils import get_file_path
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.ATTACHMENT_PROCESSING_WORKERS,
+                                       thread_name_prefix='attachments')
+    return _executor
+
+
+def encode(image, format_, **params):
+    buffer = BytesIO()
+    image.save(buffer, format=format_, **params)
+    return buffer.getvalue()
+
+
+def resize(image, size):
+    image = image.copy()
+    image.thumbnail(size)
+    return image
+
+
+def process_image(data):
+    """
+    Verify an uploaded image, strip its metadata and render the variants.
+    Pure Pillow work, Pillow releases the GIL while decoding and resizing
+    """
+    Image.open(BytesIO(data)).verify()
+
+    image = Image.open(BytesIO(data))
+    format_ = image.format
+    image = ImageOps.exif_transpose(image)
+
+    # drop EXIF, comments and text chunks, keep only what is needed to render the pixels
+    image.info = {key: value for key, value in image.info.items() if key == 'transparency'}
+
+    webp_source = image if image.mode in ('RGB', 'RGBA') else image.convert('RGBA')
+    return {
+        'format': format_.lower(),
+        'width': image.width,
+        'height': image.height,
+        'original': encode(image, format_),
+        'thumbnail': encode(resize(image, settings.ATTACHMENT_THUMBNAIL_SIZE), format_),
+        'webp': encode(resize(webp_source, settings.ATTACHMENT_WEBP_SIZE), 'WEBP',
+                       quality=settings.ATTACHMENT_WEBP_QUALITY),
+    }
+
+
+def process_attachment(attachment_id):
+    try:
+        attachment = Attachment.objects.get(id=attachment_id, status=Attachment.PENDING)
+    except Attachment.DoesNotExist:
+        return None
+
+    try:
+        with attachment.image.open('rb') as file:
+            result = process_image(file.read())
+    except Exception as e:
+        logger.error(e, exc_info=True)
+        attachment.status = Attachment.FAILED
+        attachment.save(update_fields=['status'])
+        update_duplicates(attachment, ['status'])
+        return attachment
+
+    # the upload is never rewritten in place, its name may be its SHA-256,
+    # the stripped original gets a name of its own and the upload is deleted once nothing references it
+    upload_name = attachment.image.name
+    storage = attachment.image.storage
+    ext = os.path.splitext(upload_name)[1]
+    name = get_file_path(attachment, f'image{ext}', digest=hashlib.sha256(result['original']).hexdigest())
+    if not (attachment.sha256 and settings.ATTACHMENT_CONTENT_ADDRESSED and storage.exists(name)):
+        name = storage.save(name, ContentFile(result['original']))
+    attachment.image.name = name
+
+    stem = os.path.splitext(os.path.basename(upload_name))[0]
+    attachment.thumbnail.save(f'{stem}{ext}', ContentFile(result['thumbnail']), save=False)
+    attachment.webp.save(f'{stem}.webp', ContentFile(result['webp']), save=False)
+    attachment.width = result['width']
+    attachment.height = result['height']
+    attachment.size = len(result['original'])
+    attachment.status = Attachment.READY
+    fields = ['image', 'thumbnail', 'webp', 'width', 'height', 'size', 'status']
+    with transaction.atomic():
+        attachment.save(update_fields=fields)
+        update_duplicates(attachment, fields)
+
+    if not Attachment.objects.filter(image=upload_name).exists():
+        storage.delete(upload_name)
+    return attachment
+
+
+def update_duplicates(attachment, fields):
+    """
+    Copy the result of processing to the duplicates uploaded while the attachment was pending,
+    they share its upload
+    """
+    if not attachment.sha256:
+        return
+    duplicates = Attachment.objects.filter(sha256=attachment.sha256, status=Attachment.PENDING)
+    task_ids = list(duplicates.values_list('task_id', flat=True))
+    if task_ids:
+        duplicates.update(**{field: getattr(attachment, field) for field in fields})
+        touch_tasks(task_ids)
+        publish_task_events(UPDATED, task_ids)
+
+
+def run_in_pool(attachment_id):
+    try:
+        process_attachment(attachment_id)
+    except Exception as e:
+        logger.error(e, exc_info=True)
+    finally:
+        connection.close()
+
+
+def create_attachment(task, upload):
+    """
+    Create an attachment for an uploaded image. With ATTACHMENT_CONTENT_ADDRESSED
+    an upload with a known SHA-256 reuses the stored files instead of writing a copy
+    """
+    sha256 = getattr(upload, 'sha256', '')
+    if not (sha256 and settings.ATTACHMENT_CONTENT_ADDRESSED):
+        attachment = Attachment.objects.create(task=task, image=upload)
+        schedule_processing(attachment)
+        return attachment
+
+    with transaction.atomic():
+        # the lock keeps the files from being released by a concurrent delete
+        existing = (
+            Attachment.objects.select_for_update()
+            .filter(sha256=sha256).exclude(status=Attachment.FAILED).order_by('id').first()
+        )
+        if existing is None:
+            attachment = Attachment.objects.create(task=task, image=upload, sha256=sha256)
+            schedule_processing(attachment)
+            return attachment
+
+        return Attachment.objects.create(
+            task=task, sha256=sha256, image=existing.image.name, thumbnail=existing.thumbnail.name,
+            webp=existing.webp.name, width=existing.width, height=existing.height, size=existing.size,
+            status=existing.status
+        )
+
+
+def release_files(attachment):
+    """
+    Delete the files of a deleted attachment unless other attachments still reference them:
+    duplicate uploads share all files, a processed original may also be shared by different uploads
+    """
+    for field in ('image', 'thumbnail', 'webp'):
+        file = getattr(attachment, field)
+        if file.name and not Attachment.objects.filter(**{field: file.name}).exists():
+            file.storage.delete(file.name)
+
+
+def schedule_processing(attachment):
+    """
+    Process the attachment in the background once the current transaction commits
+    """
+    if not settings.ATTACHMENT_PROCESSING_ASYNC:
+        transaction.on_commit(lambda: process_attachment(attachment.id))
+        return
+    transaction.on_commit(lambda: get_executor().submit(run_in_pool, attachment.id))
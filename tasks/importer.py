@@ -0,0 +1,212 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import User
+from .export import CSV_LIST_SEPARATOR
+from .models import Task, Executor, Attachment
+from .seed import explicit_timestamps
+
+
+class ImportRowError(ValueError):
+    pass
+
+
+def read_rows(stream, import_format):
+    """
+    Yield (line number, row) from NDJSON or from CSV written by export_tasks, the stream is read lazily
+    """
+    if import_format == 'ndjson':
+        for number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, ImportRowError(f'invalid JSON - {e}')
+        return
+
+    reader = csv.DictReader(stream)
+    for row in reader:
+        for field in ('executors', 'attachments'):
+            row[field] = [value for value in (row.get(field) or '').split(CSV_LIST_SEPARATOR) if value]
+        yield reader.line_num, row
+
+
+def copy_rows(cursor, model, columns, rows):
+    """
+    Load rows with COPY ... FROM STDIN, for psycopg2 and psycopg 3
+    """
+    buffer = io.StringIO()
+    # unquoted empty values are NULL in COPY csv, so strings are always quoted
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(rows)
+    quote = connection.ops.quote_name
+    sql = (f'COPY {quote(model._meta.db_table)} ({", ".join(quote(column) for column in columns)}) '
+           f'FROM STDIN WITH (FORMAT csv)')
+    if hasattr(cursor, 'copy_expert'):
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+    else:
+        with cursor.copy(sql) as copy:
+            copy.write(buffer.getvalue())
+
+
+class TaskImporter:
+    """
+    Loads tasks with their executors and attachments in batches: COPY on PostgreSQL, bulk_create elsewhere.
+    Users are resolved through an in-memory email -> id map, unknown ones are created with
+    create_users or the row is skipped
+    """
+    title_length = Task._meta.get_field('title').max_length
+    # only the first errors are kept, all of them are counted
+    max_errors = 100
+
+    def __init__(self, batch_size=None, create_users=False, use_copy=None):
+        self.batch_size = batch_size or settings.TASK_IMPORT_BATCH_SIZE
+        self.create_users = create_users
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.users = dict(User.objects.values_list('email', 'id').iterator(chunk_size=10000))
+        self.imported = 0
+        self.error_count = 0
+        self.errors = []
+
+    def run(self, rows, progress=None):
+        batch = []
+        for number, row in rows:
+            try:
+                batch.append(self.clean(number, row))
+            except ImportRowError as e:
+                self.add_error(number, e)
+                continue
+
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+                if progress:
+                    progress(self)
+        if batch:
+            self.write(batch)
+            if progress:
+                progress(self)
+        return self.imported
+
+    def add_error(self, number, error):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((number, str(error)))
+
+    def clean(self, number, row):
+        if isinstance(row, ImportRowError):
+            raise row
+        if not isinstance(row, dict):
+            raise ImportRowError('expected an object')
+
+        title, author = row.get('title') or '', row.get('author') or ''
+        content = row.get('content') or ''
+        if not all(isinstance(value, str) for value in (title, author, content)):
+            raise ImportRowError('title, content and author must be strings')
+        if not title or not author:
+            raise ImportRowError('title and author are required')
+        if len(title) > self.title_length:
+            raise ImportRowError(f'title is longer than {self.title_length} characters')
+
+        return {
+            'line': number,
+            'title': title,
+            'content': content,
+            'author': author,
+            'created_at': self.parse_datetime(row.get('created_at')) or timezone.now(),
+            'executors': list(dict.fromkeys(self.string_list(row, 'executors'))),
+            'attachments': self.string_list(row, 'attachments'),
+        }
+
+    def string_list(self, row, field):
+        values = row.get(field) or []
+        if not isinstance(values, list) or not all(isinstance(value, str) for value in values):
+            raise ImportRowError(f'{field} must be a list of strings')
+        return values
+
+    def parse_datetime(self, value):
+        if not value:
+            return None
+        try:
+            # well formed but impossible dates like 2024-02-30 raise ValueError
+            parsed = parse_datetime(value)
+        except (TypeError, ValueError):
+            parsed = None
+        if parsed is None:
+            raise ImportRowError(f'"{value}" is not an ISO 8601 datetime')
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+    def resolve_users(self, batch):
+        emails = {email for item in batch for email in (item['author'], *item['executors'])} - set(self.users)
+        if emails and self.create_users:
+            # no password hashing, imported users set a password through a reset
+            User.objects.bulk_create([User(email=email, password=make_password(None)) for email in emails],
+                                     ignore_conflicts=True)
+            self.users.update(User.objects.filter(email__in=emails).values_list('email', 'id'))
+
+        resolved = []
+        for item in batch:
+            if item['author'] not in self.users:
+                self.add_error(item['line'], f'unknown author {item["author"]}')
+                continue
+            item['executors'] = [self.users[email] for email in item['executors'] if email in self.users]
+            resolved.append(item)
+        return resolved
+
+    @transaction.atomic
+    def write(self, batch):
+        batch = self.resolve_users(batch)
+        # imported tasks are changes for sync clients, the exported updated_at would be older than their tokens
+        updated_at = timezone.now()
+        for item in batch:
+            item['updated_at'] = updated_at
+        if self.use_copy:
+            ids = self.write_copy(batch)
+        else:
+            ids = self.write_bulk_create(batch)
+
+        executors = [(task_id, user_id) for task_id, item in zip(ids, batch) for user_id in item['executors']]
+        attachments = [(task_id, image) for task_id, item in zip(ids, batch) for image in item['attachments']]
+        if self.use_copy:
+            with connection.cursor() as cursor:
+                copy_rows(cursor, Executor, ('task_id', 'user_id'), executors)
+                copy_rows(cursor, Attachment, ('task_id', 'image', 'sha256', 'thumbnail', 'webp', 'status'),
+                          [(task_id, image, '', '', '', Attachment.PENDING) for task_id, image in attachments])
+        else:
+            Executor.objects.bulk_create([Executor(task_id=task_id, user_id=user_id) for task_id, user_id in executors])
+            Attachment.objects.bulk_create([Attachment(task_id=task_id, image=image) for task_id, image in attachments])
+        self.imported += len(batch)
+
+    def reserve_ids(self, cursor, count):
+        """
+        Task ids taken from the sequence up front, so executors and attachments can be copied right after the tasks
+        """
+        cursor.execute('SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                       [Task._meta.db_table, 'id', count])
+        return [row[0] for row in cursor.fetchall()]
+
+    def write_copy(self, batch):
+        with connection.cursor() as cursor:
+            ids = self.reserve_ids(cursor, len(batch))
+            copy_rows(cursor, Task, ('id', 'title', 'content', 'author_id', 'created_at', 'updated_at'), [
+                (task_id, item['title'], item['content'], self.users[item['author']],
+                 item['created_at'].isoformat(), item['updated_at'].isoformat())
+                for task_id, item in zip(ids, batch)
+            ])
+        return ids
+
+    def write_bulk_create(self, batch):
+        with explicit_timestamps(Task, 'created_at', 'updated_at'):
+            tasks = Task.objects.bulk_create([
+                Task(title=item['title'], content=item['content'], author_id=self.users[item['author']],
+                     created_at=item['created_at'], updated_at=item['updated_at'])
+                for item in batch
+            ])
+        return [task.id for task in tasks]
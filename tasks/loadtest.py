@@ -0,0 +1,309 @@
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from contextlib import contextmanager
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from PIL import Image
+from rest_framework.test import APIClient
+
+from django.conf import settings
+from django.db import connection
+from django.urls import reverse
+
+from accounts.models import User
+from config.metrics import percentile
+from .models import Task, Executor
+from .seed import SEED_PASSWORD
+
+Scenario = namedtuple('Scenario', ('name', 'method', 'path', 'data', 'auth'))
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+# gunicorn app, worker class and environment of the benchmarked servers
+SERVERS = {
+    'gunicorn': ('config.wsgi', None, {'TASK_ASYNC_VIEWS': '0'}),
+    'uvicorn': ('config.asgi:application', 'uvicorn_worker.UvicornWorker', {'TASK_ASYNC_VIEWS': '1'}),
+}
+
+# metrics compared against a baseline, and whether a higher value is better
+BASELINE_METRICS = {'rps': True, 'p50_ms': False, 'p95_ms': False, 'queries': False}
+
+
+def build_scenarios(page_size=10):
+    """
+    One request per benchmarked endpoint, run as the author of a seeded task that has executors
+    """
+    task = Task.objects.filter(executors__isnull=False).order_by('id').first() or Task.objects.order_by('id').first()
+    author = User.objects.only('email').get(id=task.author_id)
+    executors = list(Executor.objects.filter(task=task).values_list('user_id', flat=True)) or [author.id]
+    credentials = {'email': author.email, 'password': SEED_PASSWORD}
+
+    return [
+        Scenario('tasks', 'get', f'{reverse("task_list_view")}?limit={page_size}', None, True),
+        Scenario('task', 'get', reverse('task_view', args=(task.id,)), None, True),
+        # users that already are executors are skipped, so this measures validation without writes
+        Scenario('executors', 'post', reverse('add_task_executor_view', args=(task.id,)), {'users': executors}, True),
+        Scenario('users', 'get', f'{reverse("user_list")}?limit={page_size}', None, True),
+        Scenario('login', 'post', reverse('token_obtain_pair'), credentials, False),
+    ], credentials
+
+
+def parse_queries(server_timing):
+    match = SERVER_TIMING_QUERIES.search(server_timing or '')
+    return int(match.group(1)) if match else None
+
+
+class ScenarioResult:
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.elapsed = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, latency_ms, status, server_timing):
+        with self.lock:
+            self.latencies.append(latency_ms)
+            if status >= 400:
+                self.errors += 1
+            if (queries := parse_queries(server_timing)) is not None:
+                self.queries.append(queries)
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'rps': round(len(latencies) / self.elapsed, 1) if self.elapsed else None,
+            'p50_ms': round(percentile(latencies, 0.5), 2) if latencies else None,
+            'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+            'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+            'queries': max(self.queries) if self.queries else None,
+        }
+
+
+def run_inprocess(scenarios, credentials, requests, warmup=5):
+    """
+    Drive the views through the test client, one request at a time
+    """
+    # outside of the test runner 'testserver' is not in ALLOWED_HOSTS
+    client = APIClient(SERVER_NAME='localhost')
+    response = client.post(reverse('token_obtain_pair'), credentials, format='json')
+    if response.status_code != 200:
+        raise RuntimeError(f'login failed with {response.status_code}: {response.content[:200]!r}')
+    token = response.json()['access']
+    results = {}
+    for scenario in scenarios:
+        client.credentials(**({'HTTP_AUTHORIZATION': f'Bearer {token}'} if scenario.auth else {}))
+        send = getattr(client, scenario.method)
+        result = results[scenario.name] = ScenarioResult(scenario.name)
+
+        for _ in range(warmup):
+            send(scenario.path, scenario.data, format='json')
+        started = time.perf_counter()
+        for _ in range(requests):
+            request_started = time.perf_counter()
+            response = send(scenario.path, scenario.data, format='json')
+            result.add((time.perf_counter() - request_started) * 1000, response.status_code,
+                       response.get('Server-Timing'))
+        result.elapsed = time.perf_counter() - started
+    return results
+
+
+def http_request(base_url, scenario, token, timeout=30):
+    headers = {'Content-Type': 'application/json'}
+    if scenario.auth:
+        headers['Authorization'] = f'Bearer {token}'
+    body = json.dumps(scenario.data).encode() if scenario.data is not None else None
+    request = urllib.request.Request(base_url + scenario.path, body, headers, method=scenario.method.upper())
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            payload = response.read()
+            return response.status, response.headers.get('Server-Timing'), payload
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers.get('Server-Timing'), error.read()
+
+
+def http_login(base_url, credentials):
+    login = Scenario('login', 'post', reverse('token_obtain_pair'), credentials, False)
+    status, _, payload = http_request(base_url, login, None)
+    if status != 200:
+        raise RuntimeError(f'login failed with {status}: {payload[:200]!r}')
+    return json.loads(payload)['access']
+
+
+def run_threads(targets):
+    """
+    Run every target in its own thread, returns the wall time
+    """
+    threads = [threading.Thread(target=target) for target in targets]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def run_http(base_url, scenarios, credentials, requests, concurrency=8, warmup=5):
+    """
+    Drive a running server over HTTP, `concurrency` client threads per endpoint
+    """
+    token = http_login(base_url, credentials)
+    results = {}
+    for scenario in scenarios:
+        for _ in range(warmup):
+            http_request(base_url, scenario, token)
+
+        result = results[scenario.name] = ScenarioResult(scenario.name)
+        remaining = iter(range(requests))
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                with lock:
+                    if next(remaining, None) is None:
+                        return
+                request_started = time.perf_counter()
+                status, server_timing, _ = http_request(base_url, scenario, token)
+                result.add((time.perf_counter() - request_started) * 1000, status, server_timing)
+
+        result.elapsed = run_threads([worker] * concurrency)
+    return results
+
+
+def image_upload(boundary='loadtest'):
+    """
+    Multipart body of a small PNG for the attachment endpoint, and its content type
+    """
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), 'red').save(buffer, 'PNG')
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="loadtest.png"\r\n'
+        f'Content-Type: image/png\r\n\r\n'
+    ).encode() + buffer.getvalue() + f'\r\n--{boundary}--\r\n'.encode()
+    return body, f'multipart/form-data; boundary={boundary}'
+
+
+def slow_request(base_url, path, token, body, content_type, seconds, pieces=10):
+    """
+    Send the body in `pieces` spread over `seconds`, like a client on a slow network
+    """
+    url = urlsplit(base_url)
+    client = http.client.HTTPConnection(url.hostname, url.port, timeout=seconds + 30)
+    try:
+        client.putrequest('POST', path)
+        client.putheader('Authorization', f'Bearer {token}')
+        client.putheader('Content-Type', content_type)
+        client.putheader('Content-Length', str(len(body)))
+        client.endheaders()
+        size = -(-len(body) // pieces)
+        for i in range(0, len(body), size):
+            time.sleep(seconds / pieces)
+            client.send(body[i:i + size])
+        response = client.getresponse()
+        response.read()
+        return response.status, response.getheader('Server-Timing')
+    finally:
+        client.close()
+
+
+def run_mixed(base_url, credentials, fast, slow, duration, fast_clients=8, slow_clients=4, slow_seconds=2):
+    """
+    `fast` scenario requests from `fast_clients` threads while `slow_clients` threads keep sending
+    the `slow` (path, body, content type) request slowly, for `duration` seconds
+    """
+    token = http_login(base_url, credentials)
+    slow_path, body, content_type = slow
+    results = {'fast': ScenarioResult('fast'), 'slow': ScenarioResult('slow')}
+    deadline = time.perf_counter() + duration
+
+    def fast_client():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, server_timing, _ = http_request(base_url, fast, token)
+            results['fast'].add((time.perf_counter() - started) * 1000, status, server_timing)
+
+    def slow_client():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status, server_timing = slow_request(base_url, slow_path, token, body, content_type, slow_seconds)
+            results['slow'].add((time.perf_counter() - started) * 1000, status, server_timing)
+
+    elapsed = run_threads([fast_client] * fast_clients + [slow_client] * slow_clients)
+    for result in results.values():
+        result.elapsed = elapsed
+    return results
+
+
+@contextmanager
+def serve(app, workers, port, worker_class=None, env=None):
+    """
+    Run a local gunicorn on the current database, workers open it through DB_ENGINE/DB_NAME,
+    see config.settings.base
+    """
+    env = dict(os.environ, DB_ENGINE=connection.settings_dict['ENGINE'], DB_NAME=str(connection.settings_dict['NAME']),
+               DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE, **(env or {}))
+    command = [sys.executable, '-m', 'gunicorn', app, '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+               '--log-level', 'warning']
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    process = subprocess.Popen(command, env=env)
+    try:
+        wait_for_port(process, port)
+        yield f'http://127.0.0.1:{port}'
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def wait_for_port(process, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not listen on {port} in {timeout}s')
+
+
+def find_regressions(report, baseline, tolerance=0.2):
+    """
+    Compare a report with a stored one: throughput may drop and latency may grow by `tolerance`,
+    query counts may not grow at all. Endpoints missing on either side are skipped
+    """
+    regressions = []
+    for name, stats in report.items():
+        if name not in baseline:
+            continue
+        for metric, higher_is_better in BASELINE_METRICS.items():
+            current, expected = stats.get(metric), baseline[name].get(metric)
+            if current is None or expected is None:
+                continue
+            if metric == 'queries':
+                regressed = current > expected
+            elif higher_is_better:
+                regressed = current < expected * (1 - tolerance)
+            else:
+                regressed = current > expected * (1 + tolerance)
+            if regressed:
+                regressions.append(f'{name}: {metric} {current} vs baseline {expected}')
+        if stats.get('errors'):
+            regressions.append(f'{name}: {stats["errors"]} failed requests')
+    return regressions
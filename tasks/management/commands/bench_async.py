@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+
+from tasks.loadtest import SERVERS, build_scenarios, image_upload, run_mixed, serve
+from tasks.models import Task
+from tasks.seed import seed_tasks, throwaway_database
+
+
+class Command(BaseCommand):
+    help = ('Compare the sync views under gunicorn sync workers with tasks.asyncviews under uvicorn workers: '
+            'task reads while other clients send request bodies over a slow network. '
+            'Runs on a seeded throwaway test database and media directory')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn workers of each server')
+        parser.add_argument('--fast-clients', type=int, default=8)
+        parser.add_argument('--slow-clients', type=int, default=4)
+        parser.add_argument('--slow-seconds', type=float, default=2, help='Upload time of a slow client')
+        parser.add_argument('--slow-request', choices=('executors', 'attachment'), default='executors',
+                            help='Slow clients add existing executors, which writes nothing, or upload an image. '
+                                 'Concurrent uploads can fail with "database is locked" on SQLite')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds per server')
+        parser.add_argument('--port', type=int, default=8766)
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            # gunicorn workers need a database they can open, not the in-memory SQLite one
+            test_name = os.path.join(directory, 'bench.sqlite3') if connection.vendor == 'sqlite' else None
+            with throwaway_database(test_name=test_name):
+                seed_tasks(users=options['users'], tasks=options['tasks'], attachment_ratio=0)
+                scenarios, credentials = build_scenarios()
+                scenarios = {scenario.name: scenario for scenario in scenarios}
+                if options['slow_request'] == 'executors':
+                    executors = scenarios['executors']
+                    slow = (executors.path, json.dumps(executors.data).encode(), 'application/json')
+                else:
+                    task = Task.objects.filter(author__email=credentials['email']).order_by('id').first()
+                    slow = (reverse('create_task_attach_image', args=(task.id,)), *image_upload())
+
+                for name, (app, worker_class, env) in SERVERS.items():
+                    env = dict(env, MEDIA_ROOT=os.path.join(directory, name))
+                    with serve(app, options['workers'], options['port'], worker_class, env) as base_url:
+                        results = run_mixed(base_url, credentials, scenarios['task'], slow, options['duration'],
+                                            options['fast_clients'], options['slow_clients'],
+                                            options['slow_seconds'])
+                    self.report(name, results)
+
+    def report(self, name, results):
+        fast, slow = results['fast'].summary(), results['slow'].summary()
+        self.stdout.write(
+            f'{name:<8} reads: {fast["rps"]} rps, p50 {fast["p50_ms"]}ms, p95 {fast["p95_ms"]}ms, '
+            f'p99 {fast["p99_ms"]}ms, {fast["errors"]} errors | slow requests: {slow["requests"]}, '
+            f'p50 {slow["p50_ms"]}ms, {slow["errors"]} errors'
+        )
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tasks.loadtest import SERVERS, build_scenarios, find_regressions, run_http, run_inprocess, serve
+from tasks.models import Task
+from tasks.seed import seed_tasks, throwaway_database
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database and measure throughput, latency percentiles and query counts '
+            'of the task and account endpoints, in-process or under a local multi-worker gunicorn. '
+            'Fails when the results regress against --baseline. Never touches the configured database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=('inprocess', 'gunicorn', 'uvicorn'), default='inprocess',
+                            help='uvicorn runs gunicorn with uvicorn workers and the async task views')
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--executors', type=int, default=2, help='Up to this many executors per task')
+        parser.add_argument('--attachment-ratio', type=float, default=0.1)
+        parser.add_argument('--requests', type=int, default=200, help='Measured requests per endpoint')
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--workers', type=int, default=4, help='gunicorn workers')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads of the HTTP modes')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database and its data')
+        parser.add_argument('--baseline', help='JSON report to compare with, fails on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed relative drop of throughput and growth of latency')
+        parser.add_argument('--save', help='Write the JSON report here, e.g. to update the baseline')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            # gunicorn workers need a database they can open, not the in-memory SQLite one
+            test_name = None
+            if options['mode'] != 'inprocess' and connection.vendor == 'sqlite':
+                test_name = os.path.join(directory, 'bench.sqlite3')
+            with throwaway_database(options['keepdb'], test_name):
+                report = self.run(options)
+
+        self.print_report(report)
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(report, file, indent=2)
+        if options['baseline']:
+            self.check_baseline(report, options)
+
+    def run(self, options):
+        if not Task.objects.exists():
+            seed_tasks(users=options['users'], tasks=options['tasks'], executors=options['executors'],
+                       attachment_ratio=options['attachment_ratio'])
+        scenarios, credentials = build_scenarios(options['page_size'])
+
+        if options['mode'] == 'inprocess':
+            endpoints = run_inprocess(scenarios, credentials, options['requests'])
+        else:
+            app, worker_class, env = SERVERS[options['mode']]
+            with serve(app, options['workers'], options['port'], worker_class, env) as base_url:
+                endpoints = run_http(base_url, scenarios, credentials, options['requests'], options['concurrency'])
+
+        return {
+            'mode': options['mode'],
+            'database': connection.vendor,
+            'dataset': {key: options[key] for key in ('tasks', 'users', 'executors', 'attachment_ratio')},
+            'endpoints': {name: result.summary() for name, result in endpoints.items()},
+        }
+
+    def print_report(self, report):
+        self.stdout.write(f'{report["mode"]} on {report["database"]}, {report["dataset"]}')
+        self.stdout.write(f'{"endpoint":<12}{"requests":>10}{"errors":>8}{"rps":>10}'
+                          f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"queries":>9}')
+        for name, stats in report['endpoints'].items():
+            self.stdout.write(f'{name:<12}{stats["requests"]:>10}{stats["errors"]:>8}{stats["rps"]!s:>10}'
+                              f'{stats["p50_ms"]!s:>10}{stats["p95_ms"]!s:>10}{stats["p99_ms"]!s:>10}'
+                              f'{stats["queries"]!s:>9}')
+
+    def check_baseline(self, report, options):
+        with open(options['baseline']) as file:
+            baseline = json.load(file)
+
+        for key in ('mode', 'database', 'dataset'):
+            if baseline.get(key) != report[key]:
+                raise CommandError(f'baseline {key} {baseline.get(key)} does not match {report[key]}')
+
+        regressions = find_regressions(report['endpoints'], baseline['endpoints'], options['tolerance'])
+        if regressions:
+            raise CommandError('regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('no regressions against the baseline'))
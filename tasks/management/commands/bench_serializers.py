@@ -0,0 +1,70 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.fastserializers import USER_VALUES, serialize_users
+from accounts.models import User
+from accounts.serializers import UserSerializer
+from config.renderers import FastJSONRenderer
+from tasks.fastserializers import serialize_tasks
+from tasks.models import Task
+from tasks.seed import seed_tasks, throwaway_database
+from tasks.serializers import TasksSerializer
+
+
+class Command(BaseCommand):
+    help = ('Compare TasksSerializer/UserSerializer with JSONRenderer against the fast read path '
+            'on a seeded throwaway test database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--page-sizes', type=int, nargs='+', default=[10, 100, 1000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            seed_tasks(users=options['users'], tasks=options['tasks'])
+            for page_size in options['page_sizes']:
+                self.compare(f'tasks x{page_size}', *self.task_pages(page_size), options['repeat'])
+                self.compare(f'users x{page_size}', *self.user_pages(page_size), options['repeat'])
+
+    def task_pages(self, page_size):
+        ids = list(Task.objects.order_by('created_at', 'id').values_list('id', flat=True)[:page_size])
+
+        def serializers():
+            tasks = {task.id: task for task in Task.objects.with_related().filter(id__in=ids)}
+            return JSONRenderer().render(TasksSerializer([tasks[task_id] for task_id in ids], many=True).data)
+
+        def fast():
+            return FastJSONRenderer().render(serialize_tasks(ids))
+
+        return serializers, fast
+
+    def user_pages(self, page_size):
+        queryset = User.objects.order_by('created_at', 'id')[:page_size]
+
+        def serializers():
+            return JSONRenderer().render(UserSerializer(queryset.all(), many=True).data)
+
+        def fast():
+            return FastJSONRenderer().render(serialize_users(queryset.values(*USER_VALUES)))
+
+        return serializers, fast
+
+    def compare(self, name, serializers, fast, repeat):
+        if serializers() != fast():
+            raise CommandError(f'{name}: the fast read path renders different output')
+
+        slow_ms, fast_ms = self.measure(serializers, repeat), self.measure(fast, repeat)
+        self.stdout.write(f'{name}: serializers {slow_ms:.2f}ms, fast {fast_ms:.2f}ms, x{slow_ms / fast_ms:.1f}')
+
+    def measure(self, render, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
@@ -0,0 +1,77 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import QueryDict
+from django.utils.http import urlencode
+
+from tasks.filters import filter_tasks
+from tasks.models import Task
+from tasks.seed import seed_tasks, throwaway_database
+
+# plan fragments that mean an index is used, a plain "SCAN tasks_task"/"Seq Scan" means it is not
+INDEX_MARKERS = ('Index Scan', 'Index Only Scan', 'Bitmap Index Scan', 'USING INDEX', 'USING COVERING INDEX',
+                 'USING INTEGER PRIMARY KEY', 'USING PRIMARY KEY')
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway test database and show the query plan and timing of every task list filter. '
+            'Never touches the configured database')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=50, help='Page size of the measured queries')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the test database and its data')
+        parser.add_argument('--analyze', action='store_true', help='EXPLAIN ANALYZE on PostgreSQL')
+
+    def handle(self, *args, **options):
+        with throwaway_database(options['keepdb']):
+            self.run(options)
+
+    def run(self, options):
+        if not Task.objects.exists():
+            started = time.perf_counter()
+            seed_tasks(users=options['users'], tasks=options['tasks'],
+                       progress=lambda count: self.stdout.write(f'\rseeded {count} tasks', ending=''))
+            self.stdout.write(f'\nseeded in {time.perf_counter() - started:.1f}s')
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        task = Task.objects.order_by('id')[Task.objects.count() // 2]
+        user_id = task.author_id
+        executor_id = task.executors.values_list('user_id', flat=True).first() or user_id
+        since = urlencode({'since': task.created_at.isoformat()})[len('since='):]
+
+        cases = {
+            'default': '',
+            'author': f'author={user_id}',
+            'executor': f'executor={executor_id}',
+            'created range': f'created_after={since}',
+            'updated range': f'updated_before={since}',
+            'has attachments': 'has_attachments=true',
+            'author + ordering': f'author={user_id}&ordering=-created_at',
+            'ordering by updated_at': 'ordering=-updated_at',
+        }
+        explain_options = {'analyze': True} if options['analyze'] and connection.vendor == 'postgresql' else {}
+
+        for name, query in cases.items():
+            params = QueryDict(query)
+            queryset = filter_tasks(Task.objects.defer('search_vector'), params, user_id)
+            ordering = [field for field in params.get('ordering', 'created_at').split(',')]
+            ordering.append('-id' if ordering[0].startswith('-') else 'id')
+            queryset = queryset.order_by(*ordering).values('id')[:options['limit']]
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+
+            plan = queryset.explain(**explain_options)
+            indexed = any(marker in plan for marker in INDEX_MARKERS)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{name}: best {min(timings):.2f}ms, {"index" if indexed else "NO INDEX"}'
+            ))
+            self.stdout.write(plan)
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tasks.export import EXPORT_FORMATS, export_lines, iter_tasks
+
+
+class Command(BaseCommand):
+    help = 'Stream all tasks as NDJSON or CSV to a file or stdout, memory use does not depend on the table size'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--output', '-o', help='File to write, stdout by default')
+        parser.add_argument('--chunk-size', type=int, help='Rows per cursor fetch, TASK_EXPORT_CHUNK_SIZE by default')
+
+    def handle(self, *args, **options):
+        self.count = 0
+        started = time.perf_counter()
+        lines = export_lines(options['format'], self.counted(iter_tasks(chunk_size=options['chunk_size'])))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+
+        self.stderr.write(f'Exported {self.count} tasks in {time.perf_counter() - started:.1f}s')
+
+    def counted(self, rows):
+        for self.count, row in enumerate(rows, start=1):
+            yield row
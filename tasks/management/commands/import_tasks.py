@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.export import EXPORT_FORMATS
+from tasks.importer import TaskImporter, read_rows
+
+
+class Command(BaseCommand):
+    help = ('Load tasks with executors and attachments from NDJSON or CSV (the export_tasks format) in batches, '
+            'with COPY on PostgreSQL and bulk_create elsewhere')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to read, - for stdin')
+        parser.add_argument('--format', choices=EXPORT_FORMATS, help='Taken from the file extension by default')
+        parser.add_argument('--batch-size', type=int, help='Rows per batch, TASK_IMPORT_BATCH_SIZE by default')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create unknown authors and executors with unusable passwords instead of '
+                                 'skipping their rows')
+        parser.add_argument('--no-copy', action='store_true', help='Use bulk_create on PostgreSQL as well')
+
+    def handle(self, *args, **options):
+        import_format = options['format'] or options['path'].rsplit('.', 1)[-1]
+        if import_format not in EXPORT_FORMATS:
+            raise CommandError('Use --format for files without an .ndjson or .csv extension')
+
+        importer = TaskImporter(batch_size=options['batch_size'], create_users=options['create_users'],
+                                use_copy=False if options['no_copy'] else None)
+        self.started = time.perf_counter()
+        if options['path'] == '-':
+            importer.run(read_rows(sys.stdin, import_format), progress=self.progress)
+        else:
+            with open(options['path'], newline='', encoding='utf-8') as stream:
+                importer.run(read_rows(stream, import_format), progress=self.progress)
+
+        for number, error in importer.errors:
+            self.stderr.write(f'line {number}: {error}')
+        if importer.error_count > len(importer.errors):
+            self.stderr.write(f'... {importer.error_count - len(importer.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {importer.imported} tasks, skipped {importer.error_count} rows '
+            f'in {time.perf_counter() - self.started:.1f}s'
+        ))
+
+    def progress(self, importer):
+        elapsed = time.perf_counter() - self.started
+        self.stderr.write(f'{importer.imported} tasks, {importer.imported / elapsed:.0f} tasks/s')
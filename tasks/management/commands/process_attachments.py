@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tasks.images import process_attachment
+from tasks.models import Attachment
+
+
+class Command(BaseCommand):
+    help = 'Process pending attachments, e.g. uploads interrupted by a restart'
+
+    def handle(self, *args, **options):
+        ids = Attachment.objects.filter(status=Attachment.PENDING).values_list('id', flat=True)
+        for attachment_id in ids.iterator():
+            attachment = process_attachment(attachment_id)
+            if attachment is not None:
+                self.stdout.write(f'{attachment_id}: {attachment.status}')
@@ -0,0 +1,16 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete tombstones older than TASK_SYNC_TOMBSTONE_DAYS, sync tokens of that age expire anyway'
+
+    def handle(self, *args, **options):
+        horizon = timezone.now() - timedelta(days=settings.TASK_SYNC_TOMBSTONE_DAYS)
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=horizon).delete()
+        self.stdout.write(f'Deleted {deleted} tombstones')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tasks import search
+
+
+class Command(BaseCommand):
+    help = 'Recreate the task full-text search index and its triggers, e.g. after SQLite rebuilt the task table'
+
+    def handle(self, *args, **options):
+        with connection.schema_editor() as schema_editor:
+            search.install(schema_editor)
+        self.stdout.write(f'Search index rebuilt for {connection.vendor}')
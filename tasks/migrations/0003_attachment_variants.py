@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:13
+
+import tasks.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_task_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='size',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Size in bytes'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10, verbose_name='Status'),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to=tasks.utils.get_file_path),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='webp',
+            field=models.ImageField(blank=True, upload_to=tasks.utils.get_file_path),
+        ),
+        migrations.AddField(
+            model_name='attachment',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
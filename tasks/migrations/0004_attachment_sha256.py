@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:15
+
+import tasks.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_attachment_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attachment',
+            name='sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64, verbose_name='SHA-256'),
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='thumbnail',
+            field=models.ImageField(blank=True, upload_to=tasks.utils.get_thumbnail_path),
+        ),
+        migrations.AlterField(
+            model_name='attachment',
+            name='webp',
+            field=models.ImageField(blank=True, upload_to=tasks.utils.get_webp_path),
+        ),
+    ]
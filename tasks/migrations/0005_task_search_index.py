@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:22
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+from tasks import search
+
+
+def install_search_index(apps, schema_editor):
+    search.install(schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_attachment_sha256'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
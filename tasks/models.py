@@ -1,6 +1,62 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from .utils import get_file_path
+from .search import search_tasks
+from .utils import get_file_path, get_thumbnail_path, get_webp_path
+
+
+def count_subquery(model):
+    """
+    COUNT of a task relation as a correlated subquery, unlike Count() it does not multiply joined rows
+    """
+    counts = model.objects.filter(task=OuterRef('pk')).order_by().values('task').annotate(count=Count('id'))
+    return Coalesce(Subquery(counts.values('count')), 0)
+
+
+class TaskQuerySet(models.QuerySet):
+
+    def with_related(self):
+        """
+        Load everything TasksSerializer renders in a fixed number of queries
+        """
+        return self.select_related('author').defer('search_vector').prefetch_related(
+            models.Prefetch('executors', queryset=Executor.objects.select_related('user').order_by('id')),
+            models.Prefetch('attachments', queryset=Attachment.objects.order_by('id')),
+        )
+
+    def for_fields(self, fields=None):
+        """
+        Load only the columns, relations and counts a sparse TasksSerializer renders,
+        None means the full representation
+        """
+        if fields is None:
+            return self.with_related()
+
+        columns = [field for field in ('title', 'content', 'created_at', 'updated_at') if field in fields]
+        if 'author' in fields:
+            columns += ['author', 'author__first_name', 'author__last_name']
+        queryset = self.only('id', *columns)
+
+        if 'author' in fields:
+            queryset = queryset.select_related('author')
+        if 'executors' in fields:
+            queryset = queryset.prefetch_related(
+                models.Prefetch('executors', queryset=Executor.objects.select_related('user').order_by('id'))
+            )
+        if 'attachments' in fields:
+            queryset = queryset.prefetch_related(
+                models.Prefetch('attachments', queryset=Attachment.objects.order_by('id'))
+            )
+        if 'executors_count' in fields:
+            queryset = queryset.annotate(executors_count=count_subquery(Executor))
+        if 'attachments_count' in fields:
+            queryset = queryset.annotate(attachments_count=count_subquery(Attachment))
+        return queryset
+
+    def search(self, query):
+        return search_tasks(self, query)
 
 
 class Task(models.Model):
@@ -9,6 +65,17 @@ class Task(models.Model):
     author = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='tasks')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # maintained by a database trigger, see tasks.search
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='task_created_at_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='task_updated_at_id_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='task_author_created_at_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -19,6 +86,7 @@ class Executor(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='executors')
 
     class Meta:
+        # also serves ?executor= lookups, user_id leads the index
         unique_together = ('user', 'task')
 
     def get_full_name(self):
@@ -26,8 +94,69 @@ class Executor(models.Model):
 
 
 class Attachment(models.Model):
+    PENDING = 'pending'
+    READY = 'ready'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+        (FAILED, 'Failed'),
+    )
+
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='attachments')
     image = models.ImageField(upload_to=get_file_path)
+    sha256 = models.CharField('SHA-256', max_length=64, blank=True, db_index=True)
+    thumbnail = models.ImageField(upload_to=get_thumbnail_path, blank=True)
+    webp = models.ImageField(upload_to=get_webp_path, blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    size = models.PositiveIntegerField('Size in bytes', null=True, blank=True)
+    status = models.CharField('Status', max_length=10, choices=STATUS_CHOICES, default=PENDING)
 
     def __str__(self):
         return self.image.url
+
+
+class TombstoneQuerySet(models.QuerySet):
+
+    def record(self, kind, pairs):
+        """
+        Tombstones for deleted (object id, task id) pairs of one kind
+        """
+        return self.record_many((kind, object_id, task_id) for object_id, task_id in pairs)
+
+    def record_many(self, entries):
+        """
+        Tombstones for deleted (kind, object id, task id) entries in one batch
+        """
+        return self.bulk_create([Tombstone(kind=kind, object_id=object_id, task_id=task_id)
+                                 for kind, object_id, task_id in entries])
+
+
+class Tombstone(models.Model):
+    """
+    Trace of a deleted task, executor or attachment for incremental sync, pruned by prune_tombstones
+    """
+    TASK = 'task'
+    EXECUTOR = 'executor'
+    ATTACHMENT = 'attachment'
+    KIND_CHOICES = (
+        (TASK, 'Task'),
+        (EXECUTOR, 'Executor'),
+        (ATTACHMENT, 'Attachment'),
+    )
+
+    kind = models.CharField('Kind', max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    objects = TombstoneQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_at_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
@@ -0,0 +1,126 @@
+"""
+Full-text search index over Task.title and Task.content.
+
+PostgreSQL keeps Task.search_vector up to date with a trigger and indexes it with GIN,
+SQLite gets an FTS5 table maintained by triggers. Triggers also cover bulk_create/bulk_update.
+"""
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F, Q, Value, FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+POSTGRESQL_INSTALL = [
+    f"""
+    CREATE OR REPLACE FUNCTION tasks_task_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.content, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    """
+    CREATE TRIGGER tasks_task_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, content ON tasks_task
+    FOR EACH ROW EXECUTE FUNCTION tasks_task_search_vector_update()
+    """,
+    "CREATE INDEX IF NOT EXISTS tasks_task_search_vector_gin ON tasks_task USING gin (search_vector)",
+    # fill the vector of existing rows through the trigger
+    "UPDATE tasks_task SET title = title",
+]
+
+POSTGRESQL_UNINSTALL = [
+    "DROP INDEX IF EXISTS tasks_task_search_vector_gin",
+    "DROP TRIGGER IF EXISTS tasks_task_search_vector_trigger ON tasks_task",
+    "DROP FUNCTION IF EXISTS tasks_task_search_vector_update()",
+]
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS tasks_task_fts
+    USING fts5(title, content, content='tasks_task', content_rowid='id')
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tasks_task_fts_update AFTER UPDATE OF title, content ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts (tasks_task_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO tasks_task_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO tasks_task_fts (tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+
+def install(schema_editor):
+    """
+    Create (or repair) the search index, also used by `manage.py rebuild_search_index`
+    """
+    statements = {'postgresql': POSTGRESQL_INSTALL, 'sqlite': SQLITE_INSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def uninstall(schema_editor):
+    statements = {'postgresql': POSTGRESQL_UNINSTALL, 'sqlite': SQLITE_UNINSTALL}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def fts5_query(query):
+    # quote every term, FTS5 syntax in user input must not leak into the MATCH expression
+    terms = ['"%s"' % term.replace('"', '""') for term in query.split()]
+    return ' '.join(terms)
+
+
+def search_tasks(queryset, query):
+    """
+    Filter tasks matching `query` and order them by relevance, annotated with `search_rank`
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        queryset = queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query))
+
+    elif vendor == 'sqlite':
+        match = fts5_query(query)
+        if not match:
+            return queryset.none()
+        queryset = queryset.filter(
+            id__in=RawSQL('SELECT rowid FROM tasks_task_fts WHERE tasks_task_fts MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            'SELECT -bm25(tasks_task_fts, %s, %s) FROM tasks_task_fts '
+            'WHERE tasks_task_fts MATCH %s AND rowid = tasks_task.id',
+            [TITLE_WEIGHT, CONTENT_WEIGHT, match], output_field=FloatField()
+        ))
+
+    else:
+        queryset = queryset.filter(Q(title__icontains=query) | Q(content__icontains=query)).annotate(
+            search_rank=Value(0.0, output_field=FloatField()))
+
+    return queryset.order_by('-search_rank', 'id')
@@ -0,0 +1,100 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils import timezone
+
+from accounts.models import User
+from .models import Task, Executor, Attachment
+
+SEED_PASSWORD = 'password'
+
+
+@contextmanager
+def throwaway_database(keepdb=False, test_name=None):
+    """
+    Switch the default connection to a test database for benchmarks, the configured one is never touched.
+    `test_name` overrides TEST['NAME'], e.g. a file instead of the in-memory SQLite database
+    """
+    creation = connection.creation
+    old_name = connection.settings_dict['NAME']
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    if test_name:
+        test_settings['NAME'] = test_name
+    creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        test_settings['NAME'] = old_test_name
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """
+    Let bulk_create keep the given auto_now/auto_now_add values instead of overwriting them
+    """
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_tasks(users=1000, tasks=100000, executors=2, attachment_ratio=0.1, days=365, batch_size=5000,
+               seed=0, progress=None):
+    """
+    Bulk-load a synthetic dataset for benchmarks: timestamps spread over `days`,
+    up to `executors` executors per task and an attachment on `attachment_ratio` of the tasks.
+    Every seeded user can log in with SEED_PASSWORD
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = int(timedelta(days=days).total_seconds())
+    password = make_password(SEED_PASSWORD)
+    prefix = f'seed{now.timestamp():.0f}'
+
+    user_ids = [user.id for user in User.objects.bulk_create(
+        [User(email=f'{prefix}-{i}@example.com', first_name='Seed', last_name=str(i), password=password)
+         for i in range(users)],
+        batch_size=batch_size,
+    )]
+
+    created = 0
+    with explicit_timestamps(Task, 'created_at', 'updated_at'):
+        while created < tasks:
+            size = min(batch_size, tasks - created)
+            batch = []
+            for i in range(size):
+                created_at = now - timedelta(seconds=rng.randrange(span))
+                batch.append(Task(
+                    title=f'Task {created + i}',
+                    content=f'Seeded task {created + i} for user benchmarks',
+                    author_id=rng.choice(user_ids),
+                    created_at=created_at,
+                    updated_at=created_at + timedelta(seconds=rng.randrange(int((now - created_at).total_seconds()) + 1)),
+                ))
+            batch = Task.objects.bulk_create(batch)
+
+            Executor.objects.bulk_create([
+                Executor(task_id=task.id, user_id=user_id)
+                for task in batch
+                for user_id in rng.sample(user_ids, rng.randint(0, min(executors, len(user_ids))))
+            ], ignore_conflicts=True)
+            Attachment.objects.bulk_create([
+                Attachment(task_id=task.id, image=f'attachment/seed/{task.id}.png', status=Attachment.READY)
+                for task in batch if rng.random() < attachment_ratio
+            ])
+
+            created += size
+            if progress:
+                progress(created)
+
+    return user_ids
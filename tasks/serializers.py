@@ -1,17 +1,94 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from django.conf import settings
+from django.utils import timezone
 
 from accounts.serializers import UserSerializer
-from .models import Task, Executor, Attachment
+from config.metrics import TimedSerializerMixin
+from .caching import invalidate_tasks
+from .events import CREATED, UPDATED, publish_task_events
+from .models import Task, Attachment
+
+
+SUMMARY_FIELDS = ('id', 'title', 'updated_at', 'executors_count', 'attachments_count')
+COUNT_FIELDS = ('executors_count', 'attachments_count')
+EXPANDABLE_FIELDS = ('author', 'executors', 'attachments')
+
+
+def get_fieldset(params):
+    """
+    Fields picked with ?fields=a,b (or ?fields=summary) plus nested relations from ?expand=,
+    None means the full representation
+    """
+    fields = [field for field in params.get('fields', '').split(',') if field.strip()]
+    expand = [field for field in params.get('expand', '').split(',') if field.strip()]
+    if not fields:
+        return None
+
+    fields = [name.strip() for field in fields for name in (SUMMARY_FIELDS if field.strip() == 'summary' else [field])]
+    expand = [field.strip() for field in expand]
+    allowed = set(TasksSerializer.Meta.fields) | set(COUNT_FIELDS)
+    if unknown := [field for field in fields if field not in allowed]:
+        raise ValidationError({'fields': [f'Unknown field "{field}"' for field in unknown]})
+    if unknown := [field for field in expand if field not in EXPANDABLE_FIELDS]:
+        raise ValidationError({'expand': [f'"{field}" can not be expanded' for field in unknown]})
+    return tuple(dict.fromkeys(['id', *fields, *expand]))
 
 
 class AttachmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Attachment
-        fields = ['id', 'image']
+        fields = ['id', 'image', 'thumbnail', 'webp', 'width', 'height', 'size', 'status']
+
+
+class TaskBulkListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Bulk writes of TasksSerializer children, created explicitly by TaskBulkView. Items are validated one by one,
+    invalid items are collected in `item_errors` by position instead of failing the batch
+    """
+    update_fields = ('title', 'content')
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items']})
 
+        self.item_errors = {}
+        self.valid_positions = []
+        validated_data = []
+        for position, item in enumerate(data):
+            try:
+                validated_data.append(self.child.run_validation(item))
+            except ValidationError as e:
+                self.item_errors[position] = e.detail
+            else:
+                self.valid_positions.append(position)
+        return validated_data
 
-class TasksSerializer(serializers.ModelSerializer):
+    def create(self, validated_data):
+        tasks = Task.objects.bulk_create([Task(**attrs) for attrs in validated_data],
+                                         batch_size=settings.TASK_BULK_BATCH_SIZE)
+        publish_task_events(CREATED, [task.id for task in tasks])
+        return tasks
+
+    def update(self, instance, validated_data):
+        # bulk_update neither sets auto_now fields nor sends signals
+        now = timezone.now()
+        for task, attrs in zip(instance, validated_data):
+            for field in self.update_fields:
+                if field in attrs:
+                    setattr(task, field, attrs[field])
+            task.updated_at = now
+
+        Task.objects.bulk_update(instance, [*self.update_fields, 'updated_at'],
+                                 batch_size=settings.TASK_BULK_BATCH_SIZE)
+        invalidate_tasks([task.id for task in instance])
+        publish_task_events(UPDATED, [task.id for task in instance])
+        return instance
+
+
+class TasksSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     executors = UserSerializer(many=True, read_only=True)
     attachments = AttachmentSerializer(many=True, read_only=True)
@@ -20,19 +97,28 @@ class TasksSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['id', 'title', 'content', 'author', 'executors', 'created_at', 'updated_at', 'attachments']
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # sparse fieldset from get_fieldset(), counts are annotated by TaskQuerySet.for_fields()
+        if (fieldset := self.context.get('fields')) is not None:
+            for field in COUNT_FIELDS:
+                if field in fieldset:
+                    self.fields[field] = serializers.IntegerField(read_only=True)
+            for field in set(self.fields) - set(fieldset):
+                self.fields.pop(field)
+
     def validate(self, attrs):
         attrs['author'] = self.context.get('user')
         return attrs
 
 
-class TaskExecutorSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Executor
-        fields = ['id', 'task', 'user']
-        validators = [
-            serializers.UniqueTogetherValidator(
-                queryset=model.objects.all(),
-                fields=('task', 'user'),
-                message="User is already executor of this task"
-            )
-        ]
+class TaskExecutorSerializer(serializers.Serializer):
+    users = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False,
+                                  max_length=1000)
+    user = serializers.IntegerField(required=False)
+
+    def validate(self, attrs):
+        users = attrs.get('users') or ([attrs['user']] if 'user' in attrs else None)
+        if not users:
+            raise ValidationError('user field is required')
+        return {'users': list(dict.fromkeys(users))}
@@ -0,0 +1,117 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .caching import invalidate_task, touch_tasks
+from .events import CREATED, UPDATED, DELETED, EXECUTORS, publish_task_events
+from .images import release_files
+from .models import Task, Executor, Attachment, Tombstone
+
+
+class RecordedDeletes(threading.local):
+    """
+    Tasks whose executor and attachment deletes are recorded in bulk, the handlers below then write
+    no tombstones, touches and events per row: `task_ids` by a caller, see deletes_recorded_in_bulk,
+    `origins` by task_deleting for the children deleted together with their task
+    """
+
+    def __init__(self):
+        self.task_ids = set()
+        # task id -> (origin of the delete, user ids of the executors)
+        self.origins = {}
+
+    def skips(self, instance, origin):
+        if instance.task_id in self.task_ids:
+            return True
+        recorded = self.origins.get(instance.task_id)
+        return recorded is not None and origin is not None and recorded[0] is origin
+
+
+recorded_deletes = RecordedDeletes()
+
+
+@contextmanager
+def deletes_recorded_in_bulk(task_ids):
+    added = set(task_ids) - recorded_deletes.task_ids
+    recorded_deletes.task_ids |= added
+    try:
+        yield
+    finally:
+        recorded_deletes.task_ids -= added
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    invalidate_task(instance.id)
+    publish_task_events(CREATED if created else UPDATED, [instance.id])
+
+
+def record_task_deletes(task_ids):
+    """
+    Tombstones of tasks about to be deleted and of their executors and attachments in one batch,
+    returns the user ids of the executors by task
+    """
+    executors = list(Executor.objects.filter(task__in=task_ids).values_list('id', 'task_id', 'user_id'))
+    attachments = Attachment.objects.filter(task__in=task_ids).values_list('id', 'task_id')
+    Tombstone.objects.record_many([
+        *((Tombstone.TASK, task_id, task_id) for task_id in task_ids),
+        *((Tombstone.EXECUTOR, executor_id, task_id) for executor_id, task_id, _ in executors),
+        *((Tombstone.ATTACHMENT, attachment_id, task_id) for attachment_id, task_id in attachments),
+    ])
+    executor_user_ids = {task_id: [] for task_id in task_ids}
+    for _, task_id, user_id in executors:
+        executor_user_ids[task_id].append(user_id)
+    return executor_user_ids
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, origin=None, **kwargs):
+    # deleted with deletes_recorded_in_bulk, the caller records the tombstones and notifies the executors
+    if instance.id in recorded_deletes.task_ids:
+        return
+    # the task and the executors and attachments deleted with it get one tombstone batch,
+    # the deleted task is not touched
+    executor_user_ids = record_task_deletes([instance.id])[instance.id]
+    recorded_deletes.origins[instance.id] = (origin, executor_user_ids)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    _, executor_user_ids = recorded_deletes.origins.pop(instance.id, (None, []))
+    invalidate_task(instance.id)
+    publish_task_events(DELETED, [instance.id], users=[instance.author_id, *executor_user_ids])
+
+
+@receiver(post_save, sender=Executor)
+def executor_saved(sender, instance, **kwargs):
+    touch_tasks([instance.task_id])
+    publish_task_events(EXECUTORS, [instance.task_id], added=[instance.user_id])
+
+
+@receiver(post_delete, sender=Executor)
+def executor_deleted(sender, instance, origin=None, **kwargs):
+    if recorded_deletes.skips(instance, origin):
+        return
+    touch_tasks([instance.task_id])
+    Tombstone.objects.record(Tombstone.EXECUTOR, [(instance.id, instance.task_id)])
+    publish_task_events(EXECUTORS, [instance.task_id], removed=[instance.user_id], users=[instance.user_id])
+
+
+@receiver(post_save, sender=Attachment)
+def attachment_saved(sender, instance, **kwargs):
+    touch_tasks([instance.task_id])
+    publish_task_events(UPDATED, [instance.task_id])
+
+
+@receiver(post_delete, sender=Attachment)
+def attachment_deleted(sender, instance, origin=None, **kwargs):
+    # also covers attachments deleted together with their task
+    transaction.on_commit(lambda: release_files(instance))
+    if recorded_deletes.skips(instance, origin):
+        return
+    touch_tasks([instance.task_id])
+    Tombstone.objects.record(Tombstone.ATTACHMENT, [(instance.id, instance.task_id)])
+    publish_task_events(UPDATED, [instance.task_id])
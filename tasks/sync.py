@@ -0,0 +1,111 @@
+"""
+Incremental sync: tasks changed and objects deleted since a token.
+
+Both streams are read by (timestamp, id) keysets over indexes. Timestamps are taken before commit,
+so a transaction may commit rows older than the last one a client has seen: once a client is caught up
+its next sync starts TASK_SYNC_OVERLAP seconds back and may see a few rows again
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from rest_framework import exceptions
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Task, Tombstone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+DELETED_KEYS = {
+    Tombstone.TASK: 'tasks',
+    Tombstone.EXECUTOR: 'executors',
+    Tombstone.ATTACHMENT: 'attachments',
+}
+
+
+class SyncTokenExpired(exceptions.APIException):
+    status_code = 410
+    default_detail = 'Sync token has expired, download all tasks again'
+    default_code = 'sync_token_expired'
+
+
+def encode_token(tasks_position, tombstones_position, caught_up):
+    data = {
+        'tasks': [tasks_position[0].isoformat(), tasks_position[1]],
+        'deleted': [tombstones_position[0].isoformat(), tombstones_position[1]],
+        'caught_up': caught_up,
+        # tombstones older than TASK_SYNC_TOMBSTONE_DAYS are pruned, so older tokens can miss deletions
+        'issued_at': timezone.now().isoformat(),
+    }
+    return base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+
+
+def decode_token(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token.encode()))
+        tasks_position = (parse_datetime(data['tasks'][0]), int(data['tasks'][1]))
+        tombstones_position = (parse_datetime(data['deleted'][0]), int(data['deleted'][1]))
+        issued_at = parse_datetime(data['issued_at'])
+    except (ValueError, TypeError, KeyError, IndexError):
+        raise exceptions.ValidationError({'since': 'Invalid sync token'})
+    timestamps = (tasks_position[0], tombstones_position[0], issued_at)
+    # naive timestamps can not be compared with the aware ones of the database
+    if None in timestamps or any(timezone.is_naive(timestamp) for timestamp in timestamps):
+        raise exceptions.ValidationError({'since': 'Invalid sync token'})
+    if issued_at < timezone.now() - timedelta(days=settings.TASK_SYNC_TOMBSTONE_DAYS):
+        raise SyncTokenExpired()
+    return tasks_position, tombstones_position, bool(data.get('caught_up'))
+
+
+def after(field, position, caught_up):
+    """
+    Rows after a (timestamp, id) position, moved TASK_SYNC_OVERLAP seconds back when the client was caught up
+    """
+    timestamp, pk = position
+    if caught_up:
+        timestamp -= timedelta(seconds=settings.TASK_SYNC_OVERLAP)
+    return Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+
+
+def changed_tasks(position, caught_up):
+    return Task.objects.filter(after('updated_at', position, caught_up)).order_by('updated_at', 'id')
+
+
+def tombstones_after(position, caught_up):
+    return Tombstone.objects.filter(after('deleted_at', position, caught_up)).order_by('deleted_at', 'id')
+
+
+def get_changes(since=None, limit=None):
+    """
+    ({'tasks': ids of changed tasks, 'deleted': {...}}, next token, has_more)
+    """
+    limit = limit or settings.TASK_SYNC_PAGE_SIZE
+    if since is None:
+        # first sync: every task, nothing to delete yet
+        latest = Tombstone.objects.order_by('-deleted_at', '-id').values_list('deleted_at', 'id').first()
+        tasks_position, tombstones_position, caught_up = (EPOCH, 0), latest or (timezone.now(), 0), False
+        tasks = Task.objects.order_by('updated_at', 'id')
+        tombstones = []
+    else:
+        tasks_position, tombstones_position, caught_up = decode_token(since)
+        tasks = changed_tasks(tasks_position, caught_up)
+        tombstones = list(tombstones_after(tombstones_position, caught_up)
+                          .values_list('deleted_at', 'id', 'kind', 'object_id')[:limit + 1])
+
+    tasks = list(tasks.values_list('updated_at', 'id')[:limit + 1])
+    has_more = len(tasks) > limit or len(tombstones) > limit
+    tasks, tombstones = tasks[:limit], tombstones[:limit]
+
+    deleted = {key: [] for key in DELETED_KEYS.values()}
+    for _, _, kind, object_id in tombstones:
+        deleted[DELETED_KEYS[kind]].append(object_id)
+
+    token = encode_token(
+        tasks[-1] if tasks else tasks_position,
+        tombstones[-1][:2] if tombstones else tombstones_position,
+        caught_up=not has_more,
+    )
+    return {'tasks': [task_id for _, task_id in tasks], 'deleted': deleted}, token, has_more
@@ -1,3 +1,1122 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import hashlib
+import json
+import shutil
+import tempfile
+from datetime import datetime
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection, transaction
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from accounts.models import User
+from config.asgi import BodySizeLimit
+from mailing.models import OutgoingEmail
+from . import asyncviews
+from .loadtest import build_scenarios, find_regressions, parse_queries, run_inprocess
+from .events import UPDATED, publish_task_events
+from .importer import TaskImporter
+from .models import Task, Executor, Attachment, Tombstone
+from .seed import seed_tasks
+from .sync import changed_tasks, tombstones_after
+from .uploadhandlers import ImageUploadHandler
+from .urls import task_urlpatterns
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class TaskQueryCountTests(APITestCase):
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password', first_name='Ann', last_name='Author')
+        self.executors = [
+            User.objects.create_user(f'executor{i}@test.com', 'password', first_name='Exec', last_name=str(i))
+            for i in range(3)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(title=f'Task {i}', content='content', author=self.user)
+            for executor in self.executors:
+                Executor.objects.create(task=task, user=executor)
+            Attachment.objects.create(task=task, image=SimpleUploadedFile(f'{i}.png', b'png'))
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_task_list_query_count_does_not_depend_on_page_size(self):
+        self.create_tasks(1)
+        single = self.count_queries(reverse('task_list_view'))
+
+        self.create_tasks(9)
+        full_page = self.count_queries(reverse('task_list_view'))
+
+        self.assertEqual(single, full_page)
+
+    def test_task_list_nested_data(self):
+        self.create_tasks(2)
+        response = self.client.get(reverse('task_list_view'))
+
+        task = response.data['results'][0]
+        self.assertEqual(task['author']['full_name'], 'Ann Author')
+        self.assertEqual(len(task['executors']), 3)
+        self.assertEqual(len(task['attachments']), 1)
+
+    def test_task_detail_query_count(self):
+        self.create_tasks(1)
+        task = Task.objects.get()
+        url = reverse('task_view', args=[task.id])
+
+        # version check, task with author, executors with users, attachments
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        # serialized payload is cached until the task changes
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data, response.data)
+
+        # file urls are absolute, payloads cached for http are not served over https
+        response = self.client.get(url, secure=True)
+        self.assertTrue(response.data['attachments'][0]['image'].startswith('https://'))
+
+
+class TaskPaginationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        Task.objects.bulk_create([Task(title=f'Task {i}', content='content', author=self.user) for i in range(15)])
+
+    def test_offset_pagination_is_default(self):
+        response = self.client.get(reverse('task_list_view'))
+
+        self.assertEqual(response.data['count'], 15)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_offset_pagination_without_count(self):
+        url = reverse('task_list_view')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {'count': 'false'})
+
+        self.assertFalse(any('COUNT(' in query['sql'] for query in ctx.captured_queries))
+
+        self.assertNotIn('count', response.data)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(url, {'count': 'false', 'offset': 10})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_cursor_pagination(self):
+        response = self.client.get(reverse('task_list_view'), {'pagination': 'cursor'})
+
+        self.assertNotIn('count', response.data)
+        first_page = [task['id'] for task in response.data['results']]
+        self.assertEqual(len(first_page), 10)
+
+        response = self.client.get(response.data['next'])
+        second_page = [task['id'] for task in response.data['results']]
+        self.assertEqual(len(second_page), 5)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(first_page + second_page, sorted(Task.objects.values_list('id', flat=True)))
+
+
+class TaskExecutorTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.executor = User.objects.create_user('executor@test.com', 'password')
+        self.task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_add_executor_queues_email(self):
+        response = self.client.post(reverse('add_task_executor_view', args=[self.task.id]), {'user': self.executor.id},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutgoingEmail.objects.get().recipients, ['executor@test.com'])
+        self.assertEqual([user['id'] for user in response.data], [self.executor.id])
+
+    def test_bulk_add_and_remove_cost_constant_queries(self):
+        url = reverse('add_task_executor_view', args=[self.task.id])
+        team = [User.objects.create_user(f'team{i}@test.com', 'password') for i in range(10)]
+
+        with CaptureQueriesContext(connection) as single:
+            self.client.post(url, {'users': [self.executor.id]}, format='json')
+        with CaptureQueriesContext(connection) as bulk:
+            response = self.client.post(url, {'users': [user.id for user in team] + [self.executor.id]},
+                                        format='json')
+
+        self.assertEqual(len(single), len(bulk))
+        self.assertEqual(len(response.data), 11)
+        self.assertEqual({user['id'] for user in response.data}, {user.id for user in team + [self.executor]})
+        # already assigned executor is not notified again
+        self.assertEqual(OutgoingEmail.objects.count(), 11)
+
+        with CaptureQueriesContext(connection) as single:
+            self.client.delete(url, {'users': [team[0].id]}, format='json')
+        with CaptureQueriesContext(connection) as bulk:
+            response = self.client.delete(url, {'users': [user.id for user in team[1:]]}, format='json')
+        self.assertEqual(len(single), len(bulk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(self.task.executors.values_list('user', flat=True)), [self.executor.id])
+        self.assertEqual(Tombstone.objects.filter(kind=Tombstone.EXECUTOR).count(), 10)
+
+    def test_add_unknown_users(self):
+        response = self.client.post(reverse('add_task_executor_view', args=[self.task.id]),
+                                    {'users': [self.executor.id, 0]}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Executor.objects.exists())
+
+    def test_remove_user_that_is_not_executor(self):
+        response = self.client.delete(reverse('add_task_executor_view', args=[self.task.id]),
+                                      {'user': self.executor.id}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, ATTACHMENT_PROCESSING_ASYNC=False)
+class AttachmentProcessingTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.client.force_authenticate(self.user)
+
+    def upload(self, data, name='photo.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('create_task_attach_image', args=[self.task.id]),
+                                    {'image': SimpleUploadedFile(name, data)}, format='multipart')
+
+    def test_upload_is_processed(self):
+        exif = Image.Exif()
+        exif[0x010e] = 'secret description'
+        buffer = BytesIO()
+        Image.new('RGB', (1000, 500), 'red').save(buffer, format='JPEG', exif=exif)
+
+        response = self.upload(buffer.getvalue())
+
+        self.assertEqual(response.status_code, 200)
+        attachment = Attachment.objects.get()
+        self.assertEqual(attachment.status, Attachment.READY)
+        self.assertEqual((attachment.width, attachment.height), (1000, 500))
+        self.assertEqual(attachment.size, attachment.image.size)
+        self.assertIn(hashlib.sha256(attachment.image.read()).hexdigest(), attachment.image.name)
+        upload_name = response.data['image_url'].split(settings.MEDIA_URL)[-1]
+        self.assertNotEqual(upload_name, attachment.image.name)
+        self.assertFalse(attachment.image.storage.exists(upload_name))
+
+        with attachment.image.open('rb') as file:
+            self.assertFalse(Image.open(file).getexif())
+        with attachment.thumbnail.open('rb') as file:
+            self.assertEqual(Image.open(file).size, (320, 160))
+        with attachment.webp.open('rb') as file:
+            self.assertEqual(Image.open(file).format, 'WEBP')
+
+        task = self.client.get(reverse('task_view', args=[self.task.id])).data
+        self.assertTrue(task['attachments'][0]['thumbnail'].endswith(attachment.thumbnail.name))
+
+    def test_broken_image_is_marked_failed(self):
+        buffer = BytesIO()
+        Image.effect_noise((200, 200), 64).save(buffer, format='PNG')
+        data = buffer.getvalue()
+
+        self.upload(data[:len(data) // 2], name='broken.png')
+
+        self.assertEqual(Attachment.objects.get().status, Attachment.FAILED)
+
+    def upload_twice(self, data, name):
+        url = reverse('create_task_attach_image', args=[self.task.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(2):
+                self.client.post(url, {'image': SimpleUploadedFile(name, data)}, format='multipart')
+        return Attachment.objects.order_by('id')
+
+    def test_pending_duplicates_follow_processing(self):
+        buffer = BytesIO()
+        Image.new('RGB', (100, 100), 'green').save(buffer, format='PNG')
+        upload, duplicate = self.upload_twice(buffer.getvalue(), 'photo.png')
+
+        self.assertEqual(upload.status, Attachment.READY)
+        self.assertEqual((upload.image.name, upload.thumbnail.name, upload.status),
+                         (duplicate.image.name, duplicate.thumbnail.name, duplicate.status))
+
+        buffer = BytesIO()
+        Image.effect_noise((200, 200), 64).save(buffer, format='PNG')
+        data = buffer.getvalue()
+        Attachment.objects.all().delete()
+        upload, duplicate = self.upload_twice(data[:len(data) // 2], 'broken.png')
+
+        self.assertEqual((upload.status, duplicate.status), (Attachment.FAILED, Attachment.FAILED))
+
+    @override_settings(ATTACHMENT_MAX_SIZE=10000)
+    def test_oversized_upload_is_rejected_while_streaming(self):
+        buffer = BytesIO()
+        Image.effect_noise((200, 200), 64).save(buffer, format='PNG')
+
+        response = self.upload(buffer.getvalue() * 20, name='big.png')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_unsupported_format_is_rejected(self):
+        response = self.upload(b'GIF89a' + b'\0' * 100, name='image.png')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attachment.objects.exists())
+
+    def test_upload_streams_to_temporary_file(self):
+        buffer = BytesIO()
+        Image.new('RGB', (10, 10)).save(buffer, format='PNG')
+        handler = ImageUploadHandler()
+        handler.new_file('image', 'image.png', 'image/png', None)
+        data = buffer.getvalue()
+
+        handler.receive_data_chunk(data[:4], 0)
+        handler.receive_data_chunk(data[4:], 4)
+        file = handler.file_complete(len(data))
+
+        self.assertIsInstance(file, TemporaryUploadedFile)
+        self.assertEqual(file.image_format, 'png')
+        self.assertEqual(file.read(), data)
+
+    @override_settings(ATTACHMENT_MAX_SIZE=100)
+    def test_upload_handler_stops_at_size_limit(self):
+        handler = ImageUploadHandler()
+        handler.new_file('image', 'image.png', 'image/png', None)
+
+        handler.receive_data_chunk(b'\x89PNG\r\n\x1a\n' + b'\0' * 80, 0)
+        with self.assertRaises(ValidationError):
+            handler.receive_data_chunk(b'\0' * 80, 88)
+
+    def test_duplicate_uploads_share_files(self):
+        buffer = BytesIO()
+        Image.new('RGB', (100, 100), 'blue').save(buffer, format='PNG')
+        self.upload(buffer.getvalue(), name='first.png')
+        self.upload(buffer.getvalue(), name='second.png')
+
+        first, second = Attachment.objects.order_by('id')
+        self.assertEqual(first.sha256, second.sha256)
+        self.assertIn(first.sha256, first.image.name)
+        self.assertEqual(
+            (first.image.name, first.thumbnail.name, first.webp.name, first.status),
+            (second.image.name, second.thumbnail.name, second.webp.name, second.status)
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(reverse('delete_task_attach_image', args=[first.id]))
+        self.assertEqual(response.status_code, 204)
+        self.assertTrue(second.image.storage.exists(second.image.name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('delete_task_attach_image', args=[second.id]))
+        for file in (second.image, second.thumbnail, second.webp):
+            self.assertFalse(file.storage.exists(file.name))
+
+
+class BodySizeLimitTests(SimpleTestCase):
+
+    async def app(self, scope, receive, send):
+        # reads the body like Django's ASGI handler, which gives up on a disconnect
+        while (message := await receive())['type'] == 'http.request' and message.get('more_body'):
+            pass
+        if message['type'] == 'http.disconnect':
+            return
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    def request(self, chunks, headers=()):
+        messages = [{'type': 'http.request', 'body': chunk, 'more_body': True} for chunk in chunks]
+        messages[-1]['more_body'] = False
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'headers': list(headers)}
+        async_to_sync(BodySizeLimit(self.app, 10))(scope, receive, send)
+        return sent[0]['status'], len(messages)
+
+    def test_limits(self):
+        self.assertEqual(self.request([b'12345', b'12345']), (200, 0))
+        # rejected on the header without reading the body
+        self.assertEqual(self.request([b'12345', b'123456'], [(b'content-length', b'11')]), (413, 2))
+        # chunked bodies stop being read at the limit
+        self.assertEqual(self.request([b'12345', b'123456', b'1']), (413, 1))
+
+
+class TaskConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.executor = User.objects.create_user('executor@test.com', 'password', first_name='Exec')
+        self.task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_task_detail_not_modified(self):
+        url = reverse('task_view', args=[self.task.id])
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Executor.objects.create(task=self.task, user=self.executor)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['executors'][0]['full_name'], 'Exec')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_task_list_not_modified(self):
+        url = reverse('task_list_view')
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Attachment.objects.create(task=self.task, image='attachment/image.png')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results'][0]['attachments']), 1)
+
+        Task.objects.create(title='Other', content='content', author=self.user)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TaskBulkTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.other = User.objects.create_user('other@test.com', 'password')
+        self.task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.other_task = Task.objects.create(title='Other', content='content', author=self.other)
+        self.client.force_authenticate(self.user)
+
+    def data_queries(self, ctx):
+        statements = (query['sql'].split()[0] for query in ctx.captured_queries)
+        return [statement for statement in statements if statement not in ('SAVEPOINT', 'RELEASE')]
+
+    def test_bulk_operations(self):
+        to_delete = Task.objects.create(title='Delete me', content='content', author=self.user)
+        items = [
+            {'action': 'create', 'title': 'New 1', 'content': 'content'},
+            {'title': 'New 2', 'content': 'content'},
+            {'action': 'create', 'content': 'no title'},
+            {'action': 'update', 'id': self.task.id, 'title': 'Updated'},
+            {'action': 'update', 'id': self.other_task.id, 'title': 'Hijacked'},
+            {'action': 'delete', 'id': to_delete.id},
+            {'action': 'delete', 'id': 0},
+        ]
+
+        response = self.client.post(reverse('task_bulk_view'), items, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result['status'] for result in response.data], [201, 201, 400, 200, 403, 204, 404])
+        self.assertIn('title', response.data[2]['errors'])
+        self.assertEqual(Task.objects.get(id=response.data[1]['id']).author, self.user)
+        self.assertEqual(Task.objects.get(id=self.task.id).title, 'Updated')
+        self.assertEqual(Task.objects.get(id=self.other_task.id).title, 'Other')
+        self.assertFalse(Task.objects.filter(id=to_delete.id).exists())
+
+    def test_bulk_create_ndjson(self):
+        body = '\n'.join(f'{{"title": "Task {i}", "content": "content"}}' for i in range(100))
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('task_bulk_view'), body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.data_queries(ctx), ['INSERT'])
+        self.assertEqual(Task.objects.filter(author=self.user).count(), 101)
+
+    def test_bulk_delete_costs_constant_queries(self):
+        def delete(count):
+            tasks = [Task.objects.create(title='Task', content='content', author=self.user) for _ in range(count)]
+            for task in tasks:
+                Executor.objects.create(task=task, user=self.other)
+                Attachment.objects.create(task=task, image='attachment/a.png')
+            items = [{'action': 'delete', 'id': task.id} for task in tasks]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(reverse('task_bulk_view'), items, format='json')
+            self.assertTrue(all(result['status'] == 204 for result in response.data))
+            return len(ctx)
+
+        self.assertEqual(delete(1), delete(20))
+        self.assertEqual(Tombstone.objects.filter(kind=Tombstone.TASK).count(), 21)
+        self.assertEqual(Tombstone.objects.filter(kind=Tombstone.EXECUTOR).count(), 21)
+        self.assertEqual(Tombstone.objects.filter(kind=Tombstone.ATTACHMENT).count(), 21)
+
+    def test_bulk_update_checks_authors_in_one_query(self):
+        tasks = Task.objects.bulk_create([Task(title='Task', content='content', author=self.user) for _ in range(50)])
+        items = [{'action': 'update', 'id': task.id, 'content': 'updated'} for task in tasks]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('task_bulk_view'), items, format='json')
+
+        self.assertEqual(self.data_queries(ctx), ['SELECT', 'UPDATE'])
+        self.assertTrue(all(result['status'] == 200 for result in response.data))
+        self.assertEqual(Task.objects.filter(content='updated').count(), 50)
+
+
+class TaskSearchTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.in_content = Task.objects.create(title='Groceries', content='buy milk and bread', author=self.user)
+        self.in_title = Task.objects.create(title='Milk delivery', content='call the farm', author=self.user)
+        Task.objects.create(title='Unrelated', content='nothing here', author=self.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('task_list_view'), {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [task['id'] for task in response.data['results']]
+
+    def test_search_ranks_title_matches_first(self):
+        self.assertEqual(self.search('milk'), [self.in_title.id, self.in_content.id])
+
+    def test_search_index_follows_updates_and_deletes(self):
+        Task.objects.filter(id=self.in_content.id).update(content='buy bread')
+        self.assertEqual(self.search('milk'), [self.in_title.id])
+
+        self.in_title.delete()
+        self.assertEqual(self.search('milk'), [])
+
+    def test_search_index_follows_bulk_create(self):
+        Task.objects.bulk_create([Task(title=f'Bulk {i}', content='imported milk', author=self.user)
+                                  for i in range(3)])
+        self.assertEqual(len(self.search('imported')), 3)
+
+    def test_search_query_syntax_is_escaped(self):
+        self.assertEqual(self.search('milk" OR title:'), [])
+        self.assertEqual(self.search('   '), [self.in_content.id, self.in_title.id, self.in_title.id + 1])
+
+
+class TaskFilterTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.other = User.objects.create_user('other@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.own = Task.objects.create(title='Own', content='content', author=self.user)
+        self.assigned = Task.objects.create(title='Assigned', content='content', author=self.other)
+        Executor.objects.create(user=self.user, task=self.assigned)
+        Attachment.objects.create(task=self.assigned, image='attachment/test.png')
+        Task.objects.filter(id=self.own.id).update(created_at='2020-01-01T00:00:00Z',
+                                                   updated_at='2020-01-02T00:00:00Z')
+
+    def filter(self, **params):
+        response = self.client.get(reverse('task_list_view'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [task['id'] for task in response.data['results']]
+
+    def test_filters(self):
+        self.assertEqual(self.filter(author='me'), [self.own.id])
+        self.assertEqual(self.filter(author=self.other.id), [self.assigned.id])
+        self.assertEqual(self.filter(executor='me'), [self.assigned.id])
+        self.assertEqual(self.filter(created_after='2021-01-01'), [self.assigned.id])
+        self.assertEqual(self.filter(created_before='2021-01-01T00:00:00+00:00'), [self.own.id])
+        self.assertEqual(self.filter(updated_after='2020-01-02', updated_before='2020-01-03'), [self.own.id])
+        self.assertEqual(self.filter(has_attachments='true'), [self.assigned.id])
+        self.assertEqual(self.filter(has_attachments='false'), [self.own.id])
+
+    def test_invalid_filters(self):
+        for params in ({'author': 'someone'}, {'author': '99999999999999999999999'}, {'executor': '-1'},
+                       {'created_after': 'yesterday'}, {'created_after': '2024-02-30'},
+                       {'updated_before': '2024-02-30T00:00:00'}, {'has_attachments': 'maybe'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('task_list_view'), params)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get(reverse('task_export_view', args=['ndjson']), {'created_after': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ordering(self):
+        self.assertEqual(self.filter(ordering='-created_at'), [self.assigned.id, self.own.id])
+        self.assertEqual(self.filter(ordering='updated_at'), [self.own.id, self.assigned.id])
+        # only indexed fields can be used
+        self.assertEqual(self.filter(ordering='-content'), [self.own.id, self.assigned.id])
+
+    def test_cursor_pagination_follows_ordering(self):
+        response = self.client.get(reverse('task_list_view'),
+                                   {'pagination': 'cursor', 'ordering': '-created_at', 'limit': 1})
+        self.assertEqual([task['id'] for task in response.data['results']], [self.assigned.id])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([task['id'] for task in response.data['results']], [self.own.id])
+
+
+class TaskFieldsetTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.executor = Executor.objects.create(user=self.user, task=self.task)
+        Attachment.objects.create(task=self.task, image='attachment/test.png')
+        Task.objects.create(title='Empty', content='content', author=self.user)
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('task_list_view'), {'count': 'false', **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data['results'], ctx.captured_queries
+
+    def test_summary(self):
+        results, queries = self.get(fields='summary')
+        self.assertEqual(results, [
+            {'id': self.task.id, 'title': 'Task', 'updated_at': results[0]['updated_at'],
+             'executors_count': 1, 'attachments_count': 1},
+            {'id': self.task.id + 1, 'title': 'Empty', 'updated_at': results[1]['updated_at'],
+             'executors_count': 0, 'attachments_count': 0},
+        ])
+        # page rows and one query for the tasks, no prefetches
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('content', queries[1]['sql'])
+
+    def test_expand(self):
+        results, queries = self.get(fields='id,title', expand='author,executors')
+        self.assertEqual(set(results[0]), {'id', 'title', 'author', 'executors'})
+        self.assertEqual(results[0]['executors'], [{'id': self.executor.id, 'full_name': ''}])
+        self.assertEqual(len(queries), 3)
+
+    def test_full_representation_by_default(self):
+        results, _ = self.get()
+        self.assertEqual(set(results[0]), {'id', 'title', 'content', 'author', 'executors', 'created_at',
+                                           'updated_at', 'attachments'})
+
+    def test_unknown_fields(self):
+        for params in ({'fields': 'password'}, {'fields': 'id', 'expand': 'title'}):
+            response = self.client.get(reverse('task_list_view'), params)
+            self.assertEqual(response.status_code, 400)
+
+
+class TaskFastReadTests(APITestCase):
+    """
+    The fast read path must render exactly the same bytes as the serializers
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password', first_name='Ann', last_name='Lee')
+        executor = User.objects.create_user('executor@test.com', 'password', first_name='Бо б')
+        self.client.force_authenticate(self.user)
+        self.task = Task.objects.create(title='Tâche "1" ', content='line\nbreak \x00 😀', author=self.user)
+        Executor.objects.create(user=executor, task=self.task)
+        Executor.objects.create(user=self.user, task=self.task)
+        Attachment.objects.create(task=self.task, image='attachment/ab/photo.png', thumbnail='attachment/ab/t.png',
+                                  width=10, height=20, size=300, status=Attachment.READY)
+        Attachment.objects.create(task=self.task, image='attachment/cd/photo.jpg')
+        Task.objects.create(title='Empty', content='', author=executor)
+
+    def assertSameOutput(self, url, params=None):
+        with override_settings(FAST_READ_SERIALIZERS=False):
+            expected = self.client.get(url, params)
+        # cached task payloads would hide the fast path
+        cache.clear()
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'))
+        return ctx.captured_queries
+
+    def test_task_list(self):
+        queries = self.assertSameOutput(reverse('task_list_view'), {'count': 'false'})
+        # page rows, tasks with authors, executors, attachments
+        self.assertEqual(len(queries), 4)
+        self.assertSameOutput(reverse('task_list_view'), {'pagination': 'cursor', 'limit': 1})
+
+    def test_task_list_fieldsets(self):
+        self.assertSameOutput(reverse('task_list_view'), {'fields': 'summary'})
+        self.assertSameOutput(reverse('task_list_view'), {'fields': 'content,created_at', 'expand': 'attachments'})
+
+    def test_task_detail(self):
+        self.assertSameOutput(reverse('task_view', args=[self.task.id]))
+
+        with override_settings(FAST_READ_SERIALIZERS=True):
+            response = self.client.get(reverse('task_view', args=[self.task.id + 100]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_user_list(self):
+        self.assertSameOutput(reverse('user_list'))
+        self.assertSameOutput(reverse('user_list'), {'pagination': 'cursor', 'limit': 1})
+
+
+@override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+class TaskExportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(title=f'Task {i}', content='a, "b"\nc', author=self.user) for i in range(5)]
+        Executor.objects.create(user=self.user, task=self.tasks[0])
+        Attachment.objects.create(task=self.tasks[0], image='attachment/a.png')
+        Attachment.objects.create(task=self.tasks[0], image='attachment/b.png')
+
+    def export(self, export_format, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('task_export_view', args=[export_format]), params)
+            content = b''.join(response).decode()
+        self.assertEqual(response.status_code, 200)
+        return content, ctx.captured_queries
+
+    def test_ndjson(self):
+        content, queries = self.export('ndjson')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [task.id for task in self.tasks])
+        self.assertEqual(rows[0]['author'], 'author@test.com')
+        self.assertEqual(rows[0]['executors'], ['author@test.com'])
+        self.assertEqual(rows[0]['attachments'], ['attachment/a.png', 'attachment/b.png'])
+        self.assertEqual(rows[0]['content'], 'a, "b"\nc')
+        # tasks, then executors and attachments for each of the 3 chunks
+        self.assertEqual(len([query for query in queries if 'tasks_' in query['sql']]), 7)
+
+    def test_csv(self):
+        content, _ = self.export('csv', author='me')
+        rows = list(csv.DictReader(StringIO(content)))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['attachments'], 'attachment/a.png;attachment/b.png')
+        self.assertEqual(rows[0]['content'], 'a, "b"\nc')
+        self.assertEqual(rows[1]['executors'], '')
+
+    def test_command(self):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('export_tasks', '--format', 'ndjson', stdout=stdout, stderr=stderr)
+        self.assertEqual(len(stdout.getvalue().splitlines()), 5)
+        self.assertIn('Exported 5 tasks', stderr.getvalue())
+
+
+class TaskImportTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def write(self, name, content):
+        path = f'{self.path}/{name}'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        path = self.write('tasks.ndjson', '\n'.join([
+            json.dumps({'title': 'First', 'content': 'text', 'author': 'author@test.com',
+                        'created_at': '2020-01-01T00:00:00Z', 'executors': ['new@test.com', 'author@test.com'],
+                        'attachments': ['attachment/a.png']}),
+            json.dumps({'title': 'No author'}),
+            'not json',
+            json.dumps({'title': 'Unknown', 'author': 'nobody@test.com'}),
+            json.dumps({'title': 'Second', 'content': '', 'author': 'new@test.com'}),
+        ]))
+        stdout, stderr = StringIO(), StringIO()
+        started = timezone.now()
+        call_command('import_tasks', path, '--create-users', '--batch-size', '2', stdout=stdout, stderr=stderr)
+
+        self.assertIn('Imported 3 tasks, skipped 2 rows', stdout.getvalue())
+        self.assertIn('line 3: invalid JSON', stderr.getvalue())
+        first = Task.objects.get(title='First')
+        self.assertEqual(first.created_at.year, 2020)
+        # sync clients see imported tasks as changes
+        self.assertGreaterEqual(first.updated_at, started)
+        self.assertEqual(sorted(first.executors.values_list('user__email', flat=True)),
+                         ['author@test.com', 'new@test.com'])
+        self.assertEqual(first.attachments.get().status, Attachment.PENDING)
+        self.assertFalse(User.objects.get(email='new@test.com').has_usable_password())
+
+    def test_invalid_rows_are_skipped(self):
+        rows = [
+            {'title': 'Impossible date', 'author': 'author@test.com', 'created_at': '2024-02-30T00:00:00'},
+            {'title': 'Number date', 'author': 'author@test.com', 'created_at': 5},
+            {'title': 5, 'author': 'author@test.com'},
+            {'title': 'Object author', 'author': {'email': 'author@test.com'}},
+            {'title': 'String executors', 'author': 'author@test.com', 'executors': 'author@test.com'},
+            {'title': 'Valid', 'author': 'author@test.com'},
+        ]
+        path = self.write('tasks.ndjson', '\n'.join(json.dumps(row) for row in rows))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_tasks', path, '--batch-size', '1', stdout=stdout, stderr=stderr)
+
+        self.assertIn('Imported 1 tasks, skipped 5 rows', stdout.getvalue())
+        for line in range(1, 6):
+            self.assertIn(f'line {line}:', stderr.getvalue())
+        self.assertEqual(list(Task.objects.values_list('title', flat=True)), ['Valid'])
+
+    def test_export_round_trip(self):
+        task = Task.objects.create(title='Task', content='a, "b"\nc', author=self.user)
+        Executor.objects.create(user=self.user, task=task)
+        Attachment.objects.create(task=task, image='attachment/a.png')
+
+        paths = [f'{self.path}/tasks.{export_format}' for export_format in ('csv', 'ndjson')]
+        for path in paths:
+            call_command('export_tasks', '--format', path.rsplit('.', 1)[-1], '--output', path, stderr=StringIO())
+        for path in paths:
+            call_command('import_tasks', path, stdout=StringIO(), stderr=StringIO())
+
+        for imported in Task.objects.exclude(id=task.id):
+            self.assertEqual((imported.title, imported.content, imported.author_id),
+                             (task.title, task.content, task.author_id))
+            self.assertEqual(imported.executors.get().user_id, self.user.id)
+            self.assertEqual(imported.attachments.get().image.name, 'attachment/a.png')
+        self.assertEqual(Task.objects.count(), 3)
+
+    def test_copy_rows(self):
+        copied = {}
+
+        def copy_rows(cursor, model, columns, rows):
+            copied[model] = [dict(zip(columns, row)) for row in rows]
+
+        importer = TaskImporter(use_copy=True)
+        started = timezone.now()
+        with mock.patch.object(importer, 'reserve_ids', return_value=[101, 102]), \
+                mock.patch('tasks.importer.copy_rows', copy_rows):
+            importer.run(enumerate([
+                {'title': 'First', 'author': 'author@test.com', 'created_at': '2020-01-01T00:00:00Z',
+                 'updated_at': '2020-01-02T00:00:00Z', 'executors': ['author@test.com'],
+                 'attachments': ['attachment/a.png']},
+                {'title': 'Second', 'author': 'author@test.com'},
+            ], start=1))
+
+        first, second = copied[Task]
+        self.assertEqual((first['id'], first['title'], first['author_id']), (101, 'First', self.user.id))
+        self.assertEqual(first['created_at'], '2020-01-01T00:00:00+00:00')
+        self.assertGreaterEqual(datetime.fromisoformat(first['updated_at']), started)
+        self.assertEqual(second['id'], 102)
+        self.assertEqual(copied[Executor], [{'task_id': 101, 'user_id': self.user.id}])
+        self.assertEqual([(row['task_id'], row['image'], row['status']) for row in copied[Attachment]],
+                         [(101, 'attachment/a.png', Attachment.PENDING)])
+
+
+class RecordingBroker:
+    messages = []
+
+    def publish(self, channel, message):
+        self.messages.append((channel, message))
+
+    def has_subscribers(self):
+        return True
+
+
+@override_settings(EVENTS_BROKER='tasks.tests.RecordingBroker')
+class TaskEventTests(APITestCase):
+
+    def setUp(self):
+        RecordingBroker.messages = []
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.executor = User.objects.create_user('executor@test.com', 'password')
+        self.client.force_authenticate(self.user)
+
+    def published(self):
+        messages = RecordingBroker.messages
+        RecordingBroker.messages = []
+        return sorted((channel, message['event'], message['task_id']) for channel, message in messages)
+
+    def channel(self, user):
+        return f'tasks.user.{user.id}'
+
+    def test_events_reach_author_and_executors(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='Task', content='content', author=self.user)
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.created', task.id)])
+
+        url = reverse('add_task_executor_view', args=[task.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'users': [self.executor.id]}, format='json')
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.executors', task.id),
+                                            (self.channel(self.executor), 'task.executors', task.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(reverse('task_view', args=[task.id]), {'title': 'New', 'content': 'content'})
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.updated', task.id),
+                                            (self.channel(self.executor), 'task.updated', task.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(url, {'users': [self.executor.id]}, format='json')
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.executors', task.id),
+                                            (self.channel(self.executor), 'task.executors', task.id)])
+
+    def test_delete_reaches_former_executors_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='Task', content='content', author=self.user)
+            Executor.objects.create(user=self.executor, task=task)
+        self.published()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('task_view', args=[task.id]))
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.deleted', task.id),
+                                            (self.channel(self.executor), 'task.deleted', task.id)])
+
+    def test_bulk_writes_publish_one_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task_bulk_view'), [
+                {'action': 'create', 'title': f'Task {i}', 'content': 'content'} for i in range(3)
+            ], format='json')
+        self.assertEqual([event for _, event, _ in self.published()], ['task.created'] * 3)
+
+    def test_rolled_back_savepoint_drops_its_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                task = Task.objects.create(title='Task', content='content', author=self.user)
+                try:
+                    with transaction.atomic():
+                        Task.objects.create(title='Rolled back', content='content', author=self.user)
+                        raise DatabaseError
+                except DatabaseError:
+                    pass
+                publish_task_events(UPDATED, [task.id])
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.created', task.id)])
+
+        try:
+            with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+                Task.objects.create(title='Rolled back', content='content', author=self.user)
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                other = Task.objects.create(title='Other', content='content', author=self.user)
+        self.assertEqual(self.published(), [(self.channel(self.user), 'task.created', other.id)])
+
+    @override_settings(EVENTS_BROKER='config.pubsub.LocalBroker')
+    def test_no_audience_queries_without_subscribers(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='Task', content='content', author=self.user)
+        with self.assertNumQueries(0), self.captureOnCommitCallbacks(execute=True) as callbacks:
+            publish_task_events(UPDATED, [task.id])
+        self.assertEqual(len(callbacks), 1)
+
+
+@override_settings(EVENTS_KEEPALIVE=60)
+class TaskEventStreamTests(TransactionTestCase):
+
+    async def test_stream(self):
+        user = await User.objects.acreate(email='author@test.com')
+        other = await User.objects.acreate(email='other@test.com')
+        await self.async_client.aforce_login(user)
+
+        response = await self.async_client.get(reverse('task_events_view'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b'retry: 60000\n\n')
+
+        await Task.objects.acreate(title='Other', content='content', author=other)
+        task = await Task.objects.acreate(title='Task', content='content', author=user)
+        event = await asyncio.wait_for(anext(stream), 5)
+        self.assertEqual(event, f'event: task.created\ndata: {{"event": "task.created", "task_id": {task.id}}}\n\n'
+                         .encode())
+        await stream.aclose()
+
+    async def test_unauthenticated(self):
+        response = await self.async_client.get(reverse('task_events_view'))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_token(self):
+        user = await User.objects.acreate(email='author@test.com')
+        access = await sync_to_async(User.get_tokens_for_user)(user)
+        response = await self.async_client.post(reverse('task_events_token_view'),
+                                                headers={'Authorization': f'Bearer {access["access"]}'})
+        token = response.json()['token']
+
+        response = await self.async_client.get(reverse('task_events_view'), {'token': token})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        await aiter(response.streaming_content).aclose()
+
+        # access tokens are not accepted in the query string, stream tokens not in the header
+        response = await self.async_client.get(reverse('task_events_view'), {'token': access['access']})
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.post(reverse('task_events_token_view'),
+                                                headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 401)
+
+
+class TaskSyncTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('author@test.com', 'password')
+        self.executor = User.objects.create_user('executor@test.com', 'password')
+        self.client.force_authenticate(self.user)
+        self.tasks = [Task.objects.create(title=f'Task {i}', content='content', author=self.user) for i in range(3)]
+
+    def sync(self, since=None, **params):
+        if since is not None:
+            params['since'] = since
+        response = self.client.get(reverse('task_sync_view'), params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def sync_all(self, since=None, **params):
+        data = self.sync(since, **params)
+        pages = [data]
+        while data['has_more']:
+            data = self.sync(data['next'], **params)
+            pages.append(data)
+        return pages
+
+    def test_initial_sync_pages_through_all_tasks(self):
+        pages = self.sync_all(limit=2)
+        self.assertEqual(len(pages), 2)
+        self.assertEqual([task['id'] for page in pages for task in page['tasks']], [task.id for task in self.tasks])
+
+    def test_changes_and_tombstones(self):
+        token = self.sync_all()[-1]['next']
+        # a caught up client sees the last TASK_SYNC_OVERLAP seconds again
+        with override_settings(TASK_SYNC_OVERLAP=0):
+            self.assertEqual(self.sync(token)['tasks'], [])
+
+            executor = Executor.objects.create(user=self.executor, task=self.tasks[0])
+            attachment = Attachment.objects.create(task=self.tasks[1], image='attachment/a.png')
+            data = self.sync(token)
+            self.assertEqual([task['id'] for task in data['tasks']], [self.tasks[0].id, self.tasks[1].id])
+            token = data['next']
+
+            self.client.delete(reverse('add_task_executor_view', args=[self.tasks[0].id]),
+                               {'users': [self.executor.id]}, format='json')
+            attachment_id, task_id = attachment.id, self.tasks[2].id
+            attachment.delete()
+            self.tasks[2].delete()
+            data = self.sync(token)
+            self.assertEqual(data['deleted'], {'tasks': [task_id], 'executors': [executor.id],
+                                               'attachments': [attachment_id]})
+            self.assertEqual([task['id'] for task in data['tasks']], [self.tasks[0].id, self.tasks[1].id])
+
+    def test_cascaded_deletes_record_tombstones_in_one_batch(self):
+        task, other = self.tasks[:2]
+        task_id = task.id
+        executors = [Executor.objects.create(user=self.executor, task=task),
+                     Executor.objects.create(user=self.user, task=task)]
+        attachments = [Attachment.objects.create(task=task, image=f'attachment/{i}.png') for i in range(2)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            task.delete()
+        self.assertEqual(len([query for query in ctx.captured_queries if query['sql'].startswith('INSERT')]), 1)
+        self.assertFalse(any(query['sql'].startswith('UPDATE') for query in ctx.captured_queries))
+        self.assertEqual(sorted(Tombstone.objects.values_list('kind', 'object_id')), sorted([
+            (Tombstone.TASK, task_id),
+            *((Tombstone.EXECUTOR, executor.id) for executor in executors),
+            *((Tombstone.ATTACHMENT, attachment.id) for attachment in attachments),
+        ]))
+
+        # executors of surviving tasks are still recorded one by one
+        executor = Executor.objects.create(user=self.executor, task=other)
+        updated_at = Task.objects.get(id=other.id).updated_at
+        self.executor.delete()
+        self.assertTrue(Tombstone.objects.filter(kind=Tombstone.EXECUTOR, object_id=executor.id).exists())
+        self.assertGreater(Task.objects.get(id=other.id).updated_at, updated_at)
+
+    def test_sync_reads_indexed_keysets(self):
+        position = (timezone.now(), 0)
+        self.assertIn('task_updated_at_id_idx', changed_tasks(position, True).values('id')[:100].explain())
+        self.assertIn('tombstone_deleted_at_id_idx', tombstones_after(position, True).values('id')[:100].explain())
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get(reverse('task_sync_view'), {'since': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+
+        naive = base64.urlsafe_b64encode(json.dumps({
+            'tasks': ['2024-01-01T00:00:00', 0], 'deleted': ['2024-01-01T00:00:00+00:00', 0],
+            'issued_at': '2024-01-01T00:00:00',
+        }).encode()).decode()
+        response = self.client.get(reverse('task_sync_view'), {'since': naive})
+        self.assertEqual(response.status_code, 400)
+
+        token = self.sync()['next']
+        with override_settings(TASK_SYNC_TOMBSTONE_DAYS=-1):
+            response = self.client.get(reverse('task_sync_view'), {'since': token})
+        self.assertEqual(response.status_code, 410)
+
+
+class TaskLoadTestTests(APITestCase):
+
+    def test_inprocess_run_reports_every_endpoint(self):
+        seed_tasks(users=5, tasks=20, batch_size=10)
+        scenarios, credentials = build_scenarios()
+        report = {name: result.summary() for name, result in run_inprocess(scenarios, credentials, 2, 1).items()}
+
+        self.assertEqual(list(report), ['tasks', 'task', 'executors', 'users', 'login'])
+        for stats in report.values():
+            self.assertEqual((stats['requests'], stats['errors']), (2, 0))
+            self.assertGreater(stats['queries'], 0)
+        self.assertEqual(find_regressions(report, report), [])
+
+    def test_regressions(self):
+        baseline = {'tasks': {'rps': 100, 'p50_ms': 10, 'p95_ms': 20, 'queries': 4}}
+        report = {'tasks': {'rps': 85, 'p50_ms': 11, 'p95_ms': 30, 'queries': 5, 'errors': 1},
+                  'login': {'rps': 1, 'errors': 0}}
+        self.assertEqual(find_regressions(report, baseline), [
+            'tasks: p95_ms 30 vs baseline 20', 'tasks: queries 5 vs baseline 4', 'tasks: 1 failed requests',
+        ])
+        self.assertEqual(parse_queries('total;dur=5.0, db;dur=1.2;desc="3 queries"'), 3)
+        self.assertIsNone(parse_queries(None))
+
+
+class AsyncURLConf:
+    urlpatterns = [
+        path('tasks/', include(task_urlpatterns(asyncviews))),
+        path('accounts/', include('accounts.urls')),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskQueryCountTests(TaskQueryCountTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskExecutorTests(TaskExecutorTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncAttachmentProcessingTests(AttachmentProcessingTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskConditionalGetTests(TaskConditionalGetTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskBulkTests(TaskBulkTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskExportTests(TaskExportTests):
+    pass
+
+
+@override_settings(ROOT_URLCONF=AsyncURLConf)
+class AsyncTaskSyncTests(TaskSyncTests):
+    pass
@@ -0,0 +1,72 @@
+import hashlib
+
+from rest_framework import exceptions
+
+from django.conf import settings
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+
+IMAGE_ERROR = 'The image can have a maximum size of 5 MB and the following formats: PNG, JPG, JPEG'
+
+SIGNATURES = {
+    b'\x89PNG\r\n\x1a\n': 'png',
+    b'\xff\xd8\xff': 'jpeg',
+}
+SIGNATURE_LENGTH = max(len(signature) for signature in SIGNATURES)
+
+# room for the multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+def sniff_format(head):
+    for signature, format_ in SIGNATURES.items():
+        if head.startswith(signature):
+            return format_
+    return None
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    Streams image uploads to a temporary file chunk by chunk, hashing them on the way.
+    Rejects the request as soon as it crosses ATTACHMENT_MAX_SIZE or the
+    first bytes are not a supported image, without buffering the body
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > settings.ATTACHMENT_MAX_SIZE + MULTIPART_OVERHEAD:
+            raise exceptions.ValidationError(IMAGE_ERROR)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.head = b''
+        self.hash = hashlib.sha256()
+        self.image_format = None
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > settings.ATTACHMENT_MAX_SIZE:
+            self.file.close()
+            raise exceptions.ValidationError(IMAGE_ERROR)
+
+        if self.image_format is None:
+            self.head = (self.head + raw_data)[:SIGNATURE_LENGTH]
+            self.image_format = sniff_format(self.head)
+            if self.image_format is None and len(self.head) == SIGNATURE_LENGTH:
+                self.file.close()
+                raise exceptions.ValidationError(IMAGE_ERROR)
+
+        self.hash.update(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        if self.image_format is None:
+            self.file.close()
+            raise exceptions.ValidationError(IMAGE_ERROR)
+
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.image_format = self.image_format
+        self.file.sha256 = self.hash.hexdigest()
+        return self.file
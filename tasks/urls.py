@@ -1,12 +1,22 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, re_path
 
-from tasks.views import TaskListView, TaskView, TaskExecutorView, CreateAttachmentView, DeleteAttachmentView
+from tasks import asyncviews, views
 
 
-urlpatterns = [
-    path('', TaskListView.as_view(), name='task_list_view'),
-    path('<int:pk>/', TaskView.as_view(), name='task_view'),
-    path('<int:task_id>/executors', TaskExecutorView.as_view(), name='add_task_executor_view'),
-    path('<int:task_id>/attachments', CreateAttachmentView.as_view(), name='create_task_attach_image'),
-    path('attachments/<int:pk>/', DeleteAttachmentView.as_view(), name='delete_task_attach_image')
-]
+def task_urlpatterns(views):
+    return [
+        path('', views.TaskListView.as_view(), name='task_list_view'),
+        path('bulk/', views.TaskBulkView.as_view(), name='task_bulk_view'),
+        path('sync', views.TaskSyncView.as_view(), name='task_sync_view'),
+        re_path(r'^export\.(?P<export_format>ndjson|csv)$', views.TaskExportView.as_view(), name='task_export_view'),
+        path('events/', views.TaskEventsView.as_view(), name='task_events_view'),
+        path('events/token/', views.TaskEventsTokenView.as_view(), name='task_events_token_view'),
+        path('<int:pk>/', views.TaskView.as_view(), name='task_view'),
+        path('<int:task_id>/executors', views.TaskExecutorView.as_view(), name='add_task_executor_view'),
+        path('<int:task_id>/attachments', views.CreateAttachmentView.as_view(), name='create_task_attach_image'),
+        path('attachments/<int:pk>/', views.DeleteAttachmentView.as_view(), name='delete_task_attach_image')
+    ]
+
+
+urlpatterns = task_urlpatterns(asyncviews if settings.TASK_ASYNC_VIEWS else views)
@@ -1,11 +1,28 @@
 import os
 import uuid
 
+from django.conf import settings
 
-def get_file_path(instance, filename):
+
+def get_file_path(instance, filename, suffix='', digest=None):
     """
-    Rename images
+    Rename images, with ATTACHMENT_CONTENT_ADDRESSED uploads are named by their SHA-256,
+    or by `digest` for files derived from them
     """
     ext = filename.split('.')[-1]
+    folder = instance.__class__.__name__.lower()
+
+    digest = digest or getattr(instance, 'sha256', '')
+    if digest and settings.ATTACHMENT_CONTENT_ADDRESSED:
+        return os.path.join(folder, digest[:2], f'{digest}{suffix}.{ext}')
+
     filename = "%s.%s" % (uuid.uuid4(), ext)
-    return os.path.join(instance.__class__.__name__.lower(), filename)
+    return os.path.join(folder, filename)
+
+
+def get_thumbnail_path(instance, filename):
+    return get_file_path(instance, filename, suffix='_thumbnail')
+
+
+def get_webp_path(instance, filename):
+    return get_file_path(instance, filename, suffix='_webp')
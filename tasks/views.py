@@ -1,34 +1,101 @@
+import asyncio
 import logging
 
-from PIL import Image
 from rest_framework import generics, status, exceptions
+from rest_framework.parsers import JSONParser
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
 
 from accounts.models import User
-from .models import Task, Executor, Attachment
-from .serializers import TasksSerializer, TaskExecutorSerializer
-from config.utils import send_email
+from accounts.serializers import UserSerializer
+from .models import Task, Executor, Attachment, Tombstone
+from .caching import touch_tasks, task_etag, task_list_etag, get_cached_task, set_cached_task
+from .fastserializers import serialize_tasks
+from .events import DELETED, EXECUTORS, format_event, publish_task_events, user_channel
+from .export import EXPORT_FORMATS, export_lines, iter_tasks
+from .filters import TaskFilterBackend, TaskOrderingFilter, filter_tasks
+from .images import create_attachment
+from .parsers import NDJSONParser
+from .sync import get_changes
+from .signals import deletes_recorded_in_bulk, record_task_deletes
+from .serializers import TaskBulkListSerializer, TasksSerializer, TaskExecutorSerializer, get_fieldset
+from .uploadhandlers import ImageUploadHandler, IMAGE_ERROR
+from config.authentication import StreamToken, authenticate_stream
+from config.pagination import TimelinePagination
+from config.pubsub import get_broker
+from config.renderers import FastReadMixin
+from mailing.utils import queue_bulk_email
 
 logger = logging.getLogger(__name__)
 
 
-class TaskListView(generics.ListCreateAPIView):
-    queryset = Task.objects.all()
+class TaskListView(FastReadMixin, generics.ListCreateAPIView):
+    queryset = Task.objects.order_by('created_at', 'id')
     serializer_class = TasksSerializer
     permission_classes = (IsAuthenticated,)
+    pagination_class = TimelinePagination
+    filter_backends = (TaskFilterBackend, TaskOrderingFilter)
+    # each one is backed by an index, see Task.Meta.indexes
+    ordering_fields = ('created_at', 'updated_at', 'id')
+    ordering = ('created_at', 'id')
+    # every field the list can be ordered by, cursor pagination reads its position from them
+    page_fields = ('id', 'title', 'author_id', 'created_at', 'updated_at')
+
+    def get_fieldset(self):
+        if self.request.method != 'GET':
+            return None
+        return get_fieldset(self.request.query_params)
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['user'] = self.request.user
+        context['fields'] = self.get_fieldset()
         return context
 
+    def get_queryset(self):
+        queryset = super().get_queryset().for_fields(self.get_fieldset())
+        if query := self.request.query_params.get('search', '').strip():
+            queryset = queryset.search(query)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # paginate light rows first, the ETag only needs ids and versions of the page
+        rows = self.paginate_queryset(queryset.values(*self.page_fields))
+        if rows is None:
+            return super().list(request, *args, **kwargs)
+
+        envelope = self.get_paginated_response([]).data
+        etag = task_list_etag(request.get_full_path(), rows, envelope)
+        if not_modified := get_conditional_response(request, etag=etag):
+            return not_modified
+
+        ids = [row['id'] for row in rows]
+        if self.fast_read:
+            data = serialize_tasks(ids, self.get_fieldset(), request)
+        else:
+            tasks = {task.id: task for task in Task.objects.for_fields(self.get_fieldset()).filter(id__in=ids)}
+            data = self.get_serializer([tasks[task_id] for task_id in ids if task_id in tasks], many=True).data
+        response = self.get_paginated_response(data)
+        response['ETag'] = etag
+        return response
 
-class TaskView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Task.objects.all()
+
+class TaskView(FastReadMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Task.objects.with_related()
     serializer_class = TasksSerializer
     permission_classes = (IsAuthenticated,)
 
@@ -47,7 +114,40 @@ class TaskView(generics.RetrieveUpdateDestroyAPIView):
         }
     )
     def get(self, request, *args, **kwargs):
-        return super().retrieve(request, *args, **kwargs)
+        updated_at = self.version_queryset().first()
+        if not_modified := self.get_not_modified(updated_at):
+            return not_modified
+        return self.set_validators(Response(self.get_data(kwargs['pk'], updated_at)), updated_at)
+
+    def version_queryset(self):
+        return Task.objects.filter(pk=self.kwargs['pk']).values_list('updated_at', flat=True)
+
+    def get_not_modified(self, updated_at):
+        """
+        304 response when the client already has this version of the task
+        """
+        if updated_at is None:
+            raise exceptions.NotFound('Task does not exist')
+        return get_conditional_response(self.request, etag=task_etag(self.kwargs['pk'], updated_at),
+                                        last_modified=int(updated_at.timestamp()))
+
+    def set_validators(self, response, updated_at):
+        response['ETag'] = task_etag(self.kwargs['pk'], updated_at)
+        response['Last-Modified'] = http_date(int(updated_at.timestamp()))
+        return response
+
+    def get_data(self, pk, updated_at):
+        base_url = self.request.build_absolute_uri('/')
+        data = get_cached_task(pk, updated_at, base_url)
+        if data is None and self.fast_read:
+            tasks = serialize_tasks([pk], request=self.request)
+            if not tasks:
+                raise exceptions.NotFound('Task does not exist')
+            data = tasks[0]
+        elif data is None:
+            data = self.get_serializer(self.get_object()).data
+            set_cached_task(pk, updated_at, base_url, data)
+        return data
 
     @swagger_auto_schema(
         operation_id='task_update',
@@ -83,92 +183,343 @@ class TaskView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
-class TaskExecutorView(APIView):
-    queryset = Executor.objects.all()
-    serializer_class = TaskExecutorSerializer
+class TaskBulkView(APIView):
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JSONParser, NDJSONParser)
+    actions = ('create', 'update', 'delete')
 
     @swagger_auto_schema(
-        operation_id='task_executor_create',
-        operation_description='Add executor to task',
+        operation_id='task_bulk',
+        operation_description='Create, update and delete tasks in one transaction. '
+                              'Accepts a JSON array or NDJSON of {"action": "create|update|delete", "id", '
+                              '"title", "content"} items and returns a result for every item',
         request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            properties={'user': openapi.Schema(type=openapi.TYPE_INTEGER, description='user id')},
-            required=['user']
+            type=openapi.TYPE_ARRAY,
+            items=openapi.Schema(
+                type=openapi.TYPE_OBJECT,
+                properties={
+                    'action': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete']),
+                    'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='task id for update and delete'),
+                    'title': openapi.Schema(type=openapi.TYPE_STRING),
+                    'content': openapi.Schema(type=openapi.TYPE_STRING),
+                }
+            )
         ),
         responses={
-            200: TasksSerializer,
+            200: 'Result of every item',
             400: 'Bad request',
-            403: 'You are not author of this task',
-            404: 'Task does not exist'
         }
     )
-    def post(self, request, task_id, *args, **kwargs):
+    def post(self, request):
+        items = request.data
+        if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+            raise exceptions.ValidationError('Expected a list of objects')
+        if len(items) > settings.TASK_BULK_MAX_ITEMS:
+            raise exceptions.ValidationError(f'At most {settings.TASK_BULK_MAX_ITEMS} items are allowed')
+
+        results = [{'index': index, 'action': item.get('action', 'create')} for index, item in enumerate(items)]
+        positions = {action: [] for action in self.actions}
+        for index, result in enumerate(results):
+            if result['action'] not in self.actions:
+                result.update(status=status.HTTP_400_BAD_REQUEST, errors={'action': ['Unknown action']})
+            elif result['action'] != 'create' and not isinstance(items[index].get('id'), int):
+                result.update(status=status.HTTP_400_BAD_REQUEST, errors={'id': ['This field is required.']})
+            else:
+                positions[result['action']].append(index)
+
+        # existence and authorship of all updated and deleted tasks in one query
+        ids = {items[index]['id'] for index in positions['update'] + positions['delete']}
+        tasks = Task.objects.filter(id__in=ids).only('id', 'author_id', 'title', 'content').in_bulk()
+        for action in ('update', 'delete'):
+            allowed = []
+            for index in positions[action]:
+                task = tasks.get(items[index]['id'])
+                if task is None:
+                    results[index].update(status=status.HTTP_404_NOT_FOUND, errors='Task does not exist')
+                elif task.author_id != request.user.id:
+                    results[index].update(status=status.HTTP_403_FORBIDDEN, errors='You are not author of this task')
+                else:
+                    allowed.append(index)
+            positions[action] = allowed
+
+        context = self.get_serializer_context()
+        create = TaskBulkListSerializer(child=TasksSerializer(), data=[items[index] for index in positions['create']],
+                                        context=context)
+        update = TaskBulkListSerializer(child=TasksSerializer(partial=True), partial=True,
+                                        data=[items[index] for index in positions['update']], context=context)
+        create.is_valid(raise_exception=True)
+        update.is_valid(raise_exception=True)
+        for serializer, action in ((create, 'create'), (update, 'update')):
+            for position, errors in serializer.item_errors.items():
+                results[positions[action][position]].update(status=status.HTTP_400_BAD_REQUEST, errors=errors)
+
+        with transaction.atomic():
+            created = create.save()
+            for position, task in zip(create.valid_positions, created):
+                results[positions['create'][position]].update(status=status.HTTP_201_CREATED, id=task.id)
+
+            update_positions = [positions['update'][position] for position in update.valid_positions]
+            update.instance = [tasks[items[index]['id']] for index in update_positions]
+            update.save()
+            for index in update_positions:
+                results[index].update(status=status.HTTP_200_OK, id=items[index]['id'])
+
+            delete_ids = [items[index]['id'] for index in positions['delete']]
+            # tombstones of all deleted tasks and their children in one batch instead of per task
+            with deletes_recorded_in_bulk(delete_ids):
+                executor_user_ids = record_task_deletes(delete_ids)
+                Task.objects.filter(id__in=delete_ids).delete()
+            for task_id, user_ids in executor_user_ids.items():
+                publish_task_events(DELETED, [task_id], users=user_ids)
+            for index in positions['delete']:
+                results[index].update(status=status.HTTP_204_NO_CONTENT, id=items[index]['id'])
+
+        return Response(results, status=status.HTTP_200_OK)
+
+    def get_serializer_context(self):
+        return {'request': self.request, 'view': self, 'user': self.request.user}
+
+
+class TaskSyncView(FastReadMixin, APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @swagger_auto_schema(
+        operation_id='task_sync',
+        operation_description='Tasks changed and ids of tasks, executors and attachments deleted since the '
+                              '"since" token of the previous sync, everything without it. '
+                              'Call again with "next" while "has_more" is true',
+        manual_parameters=[
+            openapi.Parameter('since', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        ],
+        responses={
+            200: 'Changes, deletions and the next token',
+            400: 'Invalid sync token',
+            410: 'Sync token has expired, download all tasks again',
+        }
+    )
+    def get(self, request):
         try:
-            task = Task.objects.get(id=task_id)
+            limit = min(int(request.query_params.get('limit', settings.TASK_SYNC_PAGE_SIZE)),
+                        settings.TASK_SYNC_MAX_PAGE_SIZE)
+        except ValueError:
+            raise exceptions.ValidationError({'limit': 'A valid integer is required'})
+
+        changes, token, has_more = get_changes(request.query_params.get('since'), max(limit, 1))
+        ids = changes['tasks']
+        if self.fast_read:
+            tasks = serialize_tasks(ids, request=request)
+        else:
+            by_id = {task.id: task for task in Task.objects.with_related().filter(id__in=ids)}
+            tasks = TasksSerializer([by_id[task_id] for task_id in ids if task_id in by_id], many=True,
+                                    context={'request': request}).data
+        return Response({'tasks': tasks, 'deleted': changes['deleted'], 'next': token, 'has_more': has_more})
+
+
+class TaskExportView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @swagger_auto_schema(
+        operation_id='task_export',
+        operation_description='Stream all tasks as NDJSON (export.ndjson) or CSV (export.csv). '
+                              'Accepts the task list filters',
+        responses={
+            200: 'Tasks ordered by id',
+            400: 'Bad request',
+        }
+    )
+    def get(self, request, export_format):
+        queryset = filter_tasks(Task.objects.all(), request.query_params, request.user.id)
+        response = StreamingHttpResponse(export_lines(export_format, iter_tasks(queryset)),
+                                         content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_format}"'
+        return response
+
+
+class TaskEventsTokenView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @swagger_auto_schema(
+        operation_id='task_events_token',
+        operation_description='Short-lived token to open the event stream with ?token=, for clients that can not '
+                              'set the Authorization header like EventSource',
+        responses={
+            200: openapi.Schema(type=openapi.TYPE_OBJECT,
+                                properties={'token': openapi.Schema(type=openapi.TYPE_STRING)}),
+            401: 'Unauthorized',
+        }
+    )
+    def post(self, request):
+        return Response({'token': str(StreamToken.for_user(request.user))}, status=status.HTTP_200_OK)
+
+
+class TaskEventsView(View):
+    """
+    Server-Sent Events of the tasks the user authored or executes, served by an ASGI server.
+    Every event names a task to refetch, a "resync" event means some were dropped
+    """
+
+    async def get(self, request):
+        user = await sync_to_async(authenticate_stream)(request)
+        if user is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.', 'status_code': 401},
+                                status=status.HTTP_401_UNAUTHORIZED)
+
+        subscription = get_broker().subscribe(user_channel(user.id))
+        response = StreamingHttpResponse(self.stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # stops nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, subscription):
+        try:
+            yield f'retry: {settings.EVENTS_KEEPALIVE * 1000}\n\n'
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.get(), settings.EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                else:
+                    yield format_event(message)
+        finally:
+            subscription.close()
+
+
+class TaskExecutorView(APIView):
+    queryset = Executor.objects.all()
+    serializer_class = TaskExecutorSerializer
+
+    users_schema = openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'users': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER),
+                                    description='user ids'),
+            'user': openapi.Schema(type=openapi.TYPE_INTEGER, description='single user id'),
+        }
+    )
+
+    def get_task(self, task_id):
+        try:
+            task = Task.objects.only('id', 'author_id', 'title').get(id=task_id)
         except Task.DoesNotExist:
             raise exceptions.NotFound('Task does not exist')
 
-        if task.author != request.user:
+        if task.author_id != self.request.user.id:
             raise exceptions.PermissionDenied('You are not author of this task')
+        return task
+
+    def get_user_ids(self):
+        serializer = self.serializer_class(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['users']
+
+    def users_queryset(self, task_id, user_ids):
+        """
+        Requested users annotated with their `executor_id`, validated with a single query
+        """
+        return (
+            User.objects.filter(id__in=user_ids)
+            .annotate(executor_id=Subquery(Executor.objects.filter(task=task_id, user=OuterRef('pk')).values('id')[:1]))
+            .only('id', 'email', 'first_name', 'last_name')
+        )
+
+    def get_users(self, task_id):
+        user_ids = self.get_user_ids()
+        return user_ids, list(self.users_queryset(task_id, user_ids))
+
+    def executors_queryset(self, task_id):
+        return Executor.objects.filter(task=task_id).select_related('user').order_by('id')
+
+    def executors_response(self, task_id):
+        users = [executor.user for executor in self.executors_queryset(task_id)]
+        return Response(UserSerializer(users, many=True).data, status=status.HTTP_200_OK)
+
+    def validate_new_users(self, user_ids, users):
+        if missing := set(user_ids) - {user.id for user in users}:
+            raise exceptions.ValidationError({'users': [f'Users do not exist: {sorted(missing)}']})
+        return [user for user in users if user.executor_id is None]
+
+    def add_executors(self, task, new_users):
+        with transaction.atomic():
+            Executor.objects.bulk_create([Executor(task=task, user=user) for user in new_users],
+                                         ignore_conflicts=True)
+            # bulk_create sends no signals
+            touch_tasks([task.id])
+            publish_task_events(EXECUTORS, [task.id], added=[user.id for user in new_users])
+            queue_bulk_email([
+                {
+                    'subject': 'New task', 'user': user.email, 'template': 'add_executor.html',
+                    'content': {
+                        'full_name': user.get_full_name(),
+                        'task_title': task.title,
+                        'task_link': 'not_implemented_yet'
+                    }
+                }
+                for user in new_users
+            ])
+
+    def validate_removed_users(self, user_ids, users):
+        if len(users) != len(user_ids):
+            raise exceptions.NotFound('User does not exist')
+        if any(user.executor_id is None for user in users):
+            raise exceptions.ValidationError('User is not executor of this task')
 
-        serializer = self.serializer_class(data={**request.data, 'task': task_id})
-        if serializer.is_valid():
-            executor = serializer.save()
-
-            try:
-                send_email(subject='New task', user=executor.user.email, template='add_executor.html',
-                           content={
-                               'full_name': executor.user.get_full_name(),
-                               'task_title': executor.task.title,
-                               'task_link': 'not_implemented_yet'
-                           })
-            except Exception as e:
-                logger.error(e, exc_info=True)
-
-            return Response(status=status.HTTP_200_OK)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    def remove_executors(self, task, user_ids, users):
+        # one tombstone batch, touch and event instead of one per executor
+        with transaction.atomic(), deletes_recorded_in_bulk([task.id]):
+            Executor.objects.filter(task=task, user__in=user_ids).delete()
+            Tombstone.objects.record(Tombstone.EXECUTOR, [(user.executor_id, task.id) for user in users])
+            touch_tasks([task.id])
+            publish_task_events(EXECUTORS, [task.id], removed=user_ids, users=user_ids)
+
+    @swagger_auto_schema(
+        operation_id='task_executor_create',
+        operation_description='Add executors to task, users that already are executors are skipped',
+        request_body=users_schema,
+        responses={
+            200: UserSerializer(many=True),
+            400: 'Bad request',
+            403: 'You are not author of this task',
+            404: 'Task does not exist'
+        }
+    )
+    def post(self, request, task_id, *args, **kwargs):
+        task = self.get_task(task_id)
+        user_ids, users = self.get_users(task_id)
+
+        if new_users := self.validate_new_users(user_ids, users):
+            self.add_executors(task, new_users)
+        return self.executors_response(task.id)
 
     @swagger_auto_schema(
         operation_id='task_executor_delete',
-        operation_description='Delete executor from task',
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            properties={'user': openapi.Schema(type=openapi.TYPE_INTEGER, description='user id')},
-            required=['user']
-        ),
+        operation_description='Delete executors from task',
+        request_body=users_schema,
         responses={
-            204: '',
+            200: UserSerializer(many=True),
             400: 'Bad request',
             403: 'You are not author of this task',
             404: 'Task does not exist or User does not exist'
         }
     )
     def delete(self, request, task_id):
-        try:
-            task = Task.objects.get(id=task_id)
-        except Task.DoesNotExist:
-            raise exceptions.NotFound('Task does not exist')
+        task = self.get_task(task_id)
+        user_ids, users = self.get_users(task_id)
 
-        if task.author != request.user:
-            raise exceptions.PermissionDenied('You are not author of this task')
-
-        if user_id := request.data.get('user', None):
-            if not User.objects.filter(id=user_id).exists():
-                raise exceptions.NotFound('User does not exist')
-        else:
-            raise exceptions.ValidationError('user field is required')
-
-        if executor := Executor.objects.filter(task=task_id, user=user_id):
-            executor.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        else:
-            raise exceptions.ValidationError('User is not executor of this task')
+        self.validate_removed_users(user_ids, users)
+        self.remove_executors(task, user_ids, users)
+        return self.executors_response(task.id)
 
 
 class CreateAttachmentView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def initialize_request(self, request, *args, **kwargs):
+        # must be set before the body is parsed
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
     @swagger_auto_schema(
         operation_id='task_attach_image',
         operation_description='Attach image to task',
@@ -180,7 +531,7 @@ class CreateAttachmentView(APIView):
         responses={
             200: openapi.Schema(type=openapi.TYPE_OBJECT,
                                 properties={'image_url': openapi.Schema(type=openapi.FORMAT_URI)}),
-            400: 'The image can have a maximum size of 5 MB and the following formats: PNG, JPG, JPEG, SVG',
+            400: IMAGE_ERROR,
             403: 'You are not author of this task',
             404: 'Task does not exist'
         }
@@ -191,16 +542,20 @@ class CreateAttachmentView(APIView):
         except Task.DoesNotExist:
             raise exceptions.NotFound('Task does not exist')
 
-        if task.author != request.user:
+        if task.author_id != request.user.id:
             raise exceptions.PermissionDenied('You are not author of this task')
+        return self.attach(task, self.get_image())
+
+    def get_image(self):
+        # parsing streams the upload through ImageUploadHandler
+        image = self.request.FILES.get('image')
+        if image is None or getattr(image, 'image_format', None) is None:
+            raise exceptions.ValidationError(IMAGE_ERROR)
+        return image
 
+    def attach(self, task, image):
         try:
-            uploaded_photo = Image.open(request.data['image'])
-            format_ = uploaded_photo.format
-            if format_.lower() not in ('png', 'jpg', 'jpeg', 'svg') or request.FILES['image'].size > 5000000:
-                raise exceptions.ValidationError(
-                    'The image can have a maximum size of 5 MB and the following formats: PNG, JPG, JPEG, SVG')
-            attach = Attachment.objects.create(task=task, image=request.data['image'])
+            attach = create_attachment(task, image)
             return Response({"image_url": attach.image.url}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(e, exc_info=True)
@@ -212,7 +567,7 @@ class DeleteAttachmentView(APIView):
 
     def get_object(self):
         try:
-            return Attachment.objects.get(id=self.kwargs['pk'])
+            return Attachment.objects.select_related('task').get(id=self.kwargs['pk'])
         except Attachment.DoesNotExist:
             raise exceptions.NotFound('Attachment does not exist')
 
@@ -228,7 +583,7 @@ class DeleteAttachmentView(APIView):
     )
     def delete(self, request, *args, **kwargs):
         attachment = self.get_object()
-        if attachment.task.author != request.user:
+        if attachment.task.author_id != request.user.id:
             raise exceptions.PermissionDenied('You are not author of this task')
         attachment.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)